@@ -0,0 +1,302 @@
+"""
+画像アセットの読み込みと変形結果をキャッシュするモジュール
+"""
+import json
+import math
+import mmap
+import os
+from typing import Any, Callable, Collection, Hashable
+
+import pygame as pg
+from pygame.surface import Surface
+
+
+class RotationCache:
+    """
+    画像を一定の角度刻みで事前に回転しておき、最も近い角度の画像を返すクラス
+    """
+
+    def __init__(self,
+                 image: Surface,
+                 steps: int = 64,
+                 image_angle: float = 0.0,
+                 colorkey: tuple[int, int, int] | None = None) -> None:
+        """
+        引数1: 元の画像
+        引数2: 1周を何分割するか
+        引数3: 元の画像が向いている方向（度、右が0で反時計回り）
+        引数4: 回転後の画像に設定するカラーキー（Noneなら設定しない）
+        """
+        self.steps = steps
+        self.image_angle = image_angle
+        self.images: list[Surface] = []
+        for i in range(steps):
+            # -180°～180°の範囲の回転角度にする
+            angle = (i * 360 / steps - image_angle + 180) % 360 - 180
+            rotated = image.copy() if angle == 0 else pg.transform.rotozoom(image, angle, 1)
+            if colorkey is not None:
+                rotated.set_colorkey(colorkey)
+            self.images.append(rotated)
+
+    def get(self, angle: float) -> Surface:
+        """
+        angle度（右が0で反時計回り）を向いた画像を返す関数
+        """
+        return self.images[round(angle * self.steps / 360) % self.steps]
+
+    def get_by_vector(self, vx: float, vy: float) -> Surface:
+        """
+        画面座標の方向ベクトル(vx, vy)を向いた画像を返す関数
+        """
+        return self.get(math.degrees(math.atan2(-vy, vx)))
+
+
+class Assets:
+    """
+    画像を一度だけ読み込み、拡大縮小・回転した画像をキーごとに使い回すためのクラス
+    """
+
+    # bake_atlasで書き出すアトラスのパス（拡張子無し。.binにピクセル、.jsonに索引）
+    ATLAS_PATH = "./fig/atlas"
+    # アトラスの幅（この幅に収まるように画像を段ごとに詰める）
+    ATLAS_WIDTH = 1024
+
+    _cache: dict[Hashable, Surface] = {}
+    _rotations: dict[Hashable, RotationCache] = {}
+    # 読み込んだアトラス（ピクセルはmmapしたファイルを直接参照する）と、キーごとの(範囲, 透過するか)
+    _atlas: Surface | None = None
+    _atlas_buffer: mmap.mmap | None = None
+    _atlas_entries: dict[Hashable, tuple[list[int], bool]] = {}
+    # アトラスに入っている画像の元のファイル
+    _atlas_sources: set[str] = set()
+    hits = 0
+    misses = 0
+    atlas_hits = 0
+
+    @classmethod
+    def get(cls, key: Hashable, factory: Callable[[], Surface]) -> Surface:
+        """
+        キーに対応する画像を返す関数。キャッシュに無ければアトラスから切り出すか、factoryで生成して登録する
+        引数1: キャッシュのキー
+        引数2: 画像を生成する関数
+        戻り値: 画像
+        """
+        surface = cls._cache.get(key)
+        if surface is not None:
+            cls.hits += 1
+            return surface
+        atlas_entry = cls._atlas_entries.get(key)
+        if atlas_entry is not None:
+            cls.atlas_hits += 1
+            surface = cls._extract(*atlas_entry)
+        else:
+            cls.misses += 1
+            surface = factory()
+        cls._cache[key] = surface
+        return surface
+
+    @classmethod
+    def has(cls, key: Hashable) -> bool:
+        """
+        キーに対応する画像がキャッシュかアトラスにあるかどうかを返す関数
+        """
+        return key in cls._cache or key in cls._atlas_entries
+
+    @classmethod
+    def add(cls, key: Hashable, surface: Surface) -> bool:
+        """
+        別の場所で読み込んだ画像をキーに登録する関数（既に登録されていれば何もしない）
+        戻り値: 登録したならTrue
+        """
+        if key in cls._cache:
+            return False
+        cls._cache[key] = surface
+        return True
+
+    @classmethod
+    def image(cls, path: str, alpha: bool = True) -> Surface:
+        """
+        画像ファイルを読み込む関数。ウィンドウ生成後であれば描画用のピクセル形式に変換する
+        引数1: 画像ファイルのパス
+        引数2: 透過情報を残すかどうか（Falseでconvert()を使う）
+        戻り値: 画像
+        """
+        def load() -> Surface:
+            surface = pg.image.load(path)
+            if pg.display.get_surface() is None:
+                return surface
+            return surface.convert_alpha() if alpha else surface.convert()
+        return cls.get(("image", path, alpha), load)
+
+    @classmethod
+    def scaled(cls, path: str, size: tuple[int, int]) -> Surface:
+        """
+        画像を指定サイズに拡大縮小したものを返す関数
+        引数1: 画像ファイルのパス
+        引数2: 拡大縮小後のサイズ
+        戻り値: 画像
+        """
+        return cls.get(("scaled", path, size), lambda: pg.transform.scale(cls.image(path), size))
+
+    @classmethod
+    def transform(cls, path: str, scale: float = 1.0, angle: float = 0.0, flip_x: bool = False) -> Surface:
+        """
+        画像を倍率scaleで拡大縮小し、必要なら左右反転してからangle度回転したものを返す関数
+        引数1: 画像ファイルのパス
+        引数2: 表示倍率
+        引数3: 回転角度（度）
+        引数4: 左右反転するかどうか
+        戻り値: 画像
+        """
+        if angle != 0:
+            return cls.get(("transform", path, scale, angle, flip_x),
+                           lambda: pg.transform.rotozoom(cls.transform(path, scale, 0, flip_x), angle, 1.0))
+        if flip_x:
+            return cls.get(("transform", path, scale, 0, True),
+                           lambda: pg.transform.flip(cls.transform(path, scale), True, False))
+        if scale == 1.0:
+            return cls.image(path)
+        return cls.get(("transform", path, scale, 0, False),
+                       lambda: pg.transform.rotozoom(cls.image(path), 0, scale))
+
+    @classmethod
+    def rotations(cls,
+                  image: Surface,
+                  steps: int = 64,
+                  image_angle: float = 0.0,
+                  colorkey: tuple[int, int, int] | None = None) -> RotationCache:
+        """
+        画像を事前に回転したRotationCacheを返す関数（同じ画像・同じ設定なら使い回す）
+        引数はRotationCacheと同じ
+        """
+        key = (image, steps, image_angle, colorkey)
+        rotations = cls._rotations.get(key)
+        if rotations is not None:
+            cls.hits += 1
+            return rotations
+        cls.misses += 1
+        rotations = RotationCache(image, steps, image_angle, colorkey)
+        cls._rotations[key] = rotations
+        return rotations
+
+    @classmethod
+    def bake_atlas(cls, path: str = ATLAS_PATH, images: Collection[Surface] | None = None) -> dict[str, int]:
+        """
+        キャッシュにある画像を1枚のアトラスに詰めて、生のRGBAピクセルと索引をファイルに書き出す関数
+        引数1: 出力先のパス（拡張子無し）
+        引数2: アトラスに入れる画像（Noneならキャッシュにある全ての画像）
+        戻り値: 画像の数とアトラスのサイズ
+        """
+        entries = sorted(((key, surface) for key, surface in cls._cache.items() if images is None or surface in images),
+                         key=lambda item: -item[1].get_height())
+        # 高さの大きい順に、左から右へ段ごとに並べる
+        placed = []
+        x = y = shelf_height = 0
+        for key, surface in entries:
+            w, h = surface.get_size()
+            if x + w > cls.ATLAS_WIDTH:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            placed.append((key, surface, (x, y, w, h)))
+            x += w
+            shelf_height = max(shelf_height, h)
+        height = y + shelf_height
+
+        atlas = Surface((cls.ATLAS_WIDTH, height), pg.SRCALPHA)
+        atlas.blits([(surface, rect[:2]) for _, surface, rect in placed], False)
+        sources = {}
+        for key, _, _ in placed:
+            for part in key if isinstance(key, tuple) else (key,):
+                if isinstance(part, str) and os.path.isfile(part):
+                    sources[part] = os.path.getmtime(part)
+        index = {
+            "size": [cls.ATLAS_WIDTH, height],
+            "sources": sources,
+            "entries": [{"key": key, "rect": rect, "alpha": cls._has_alpha(key, surface)}
+                        for key, surface, rect in placed],
+        }
+        with open(path + ".bin", "wb") as f:
+            f.write(pg.image.tobytes(atlas, "RGBA"))
+        with open(path + ".json", "w") as f:
+            json.dump(index, f)
+        return {"images": len(placed), "width": cls.ATLAS_WIDTH, "height": height}
+
+    @staticmethod
+    def _has_alpha(key: Hashable, surface: Surface) -> bool:
+        # image(path, alpha=False)で読み込んだ画像は透過情報を持っていてもconvert()で読み込む
+        if isinstance(key, tuple) and key[0] == "image" and not key[2]:
+            return False
+        return surface.get_flags() & pg.SRCALPHA != 0
+
+    @classmethod
+    def load_atlas(cls, path: str = ATLAS_PATH) -> int:
+        """
+        bake_atlasで書き出したアトラスをmmapで読み込む関数。各画像は最初に使われた時に切り出す
+        アトラスが無い場合や、元の画像ファイルが焼き込んだ時から変わっている場合は何もしない
+        引数1: アトラスのパス（拡張子無し）
+        戻り値: アトラスに入っている画像の数
+        """
+        try:
+            with open(path + ".json") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if any(not os.path.isfile(source) or os.path.getmtime(source) != mtime
+               for source, mtime in index["sources"].items()):
+            return 0
+
+        def to_key(value: Any) -> Hashable:
+            # JSONでリストになったタプルを戻す
+            return tuple(to_key(v) for v in value) if isinstance(value, list) else value
+
+        cls._close_atlas()
+        with open(path + ".bin", "rb") as f:
+            cls._atlas_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        cls._atlas = pg.image.frombuffer(cls._atlas_buffer, index["size"], "RGBA")
+        cls._atlas_entries = {to_key(entry["key"]): (entry["rect"], entry["alpha"]) for entry in index["entries"]}
+        cls._atlas_sources = set(index["sources"])
+        return len(cls._atlas_entries)
+
+    @classmethod
+    def in_atlas(cls, path: str) -> bool:
+        """
+        読み込んだアトラスにpathの画像から作った画像が入っているかどうかを返す関数
+        入っていれば、元のファイルはアトラスに無い画像を作る時にしか使わない
+        """
+        return path in cls._atlas_sources
+
+    @classmethod
+    def _extract(cls, rect: list[int], alpha: bool) -> Surface:
+        # アトラスの一部を切り出して、ファイルのバッファを参照しない画像にする
+        image = cls._atlas.subsurface(rect)
+        if pg.display.get_surface() is None:
+            return image.copy()
+        return image.convert_alpha() if alpha else image.convert()
+
+    @classmethod
+    def _close_atlas(cls) -> None:
+        # mmapを閉じる前にバッファを参照しているSurfaceを破棄する
+        cls._atlas = None
+        cls._atlas_entries = {}
+        cls._atlas_sources = set()
+        if cls._atlas_buffer is not None:
+            cls._atlas_buffer.close()
+            cls._atlas_buffer = None
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """
+        キャッシュのヒット数・ミス数・アトラスから切り出した数・登録数を返す関数
+        """
+        return {"hits": cls.hits, "misses": cls.misses, "atlas_hits": cls.atlas_hits,
+                "entries": len(cls._cache), "rotations": len(cls._rotations)}
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        キャッシュと統計情報を破棄する関数
+        """
+        cls._cache.clear()
+        cls._rotations.clear()
+        cls.hits = 0
+        cls.misses = 0
+        cls.atlas_hits = 0
@@ -0,0 +1,33 @@
+"""
+ゲームで使う画像を全て1枚のアトラスに焼き込むスクリプト（起動時のPNGの読み込みと拡大縮小を省くため）
+使い方: python bake_atlas.py
+画像を変更したら実行し直すこと（元の画像ファイルが変わったアトラスは読み込まれない）
+"""
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import argparse
+import json
+
+import pygame as pg
+
+import survive
+from assets import Assets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bake every image variant the game uses into one atlas.")
+    parser.add_argument("--output", default=Assets.ATLAS_PATH, help="output path without extension (.bin and .json are written)")
+    args = parser.parse_args()
+
+    survive.init_pygame()
+    # 元の大きさのまま使わない画像は、拡大縮小した画像の生成元でしかないので入れない
+    images = set(survive.preload_images())
+    print(json.dumps(Assets.bake_atlas(args.output, images)))
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
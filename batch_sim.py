@@ -0,0 +1,259 @@
+"""
+ウェーブの定義と攻撃強化のスコアを調整するため、ボットにプレイさせた60秒のゲームを
+複数プロセスでまとめてヘッドレス実行し、設定ごとの集計結果を列ごとのCSVで出力するスクリプト
+使い方: python batch_sim.py --runs 1000 [--configs configs.json] [--output results.csv]
+      python batch_sim.py --check-repeat（同じシードを同じプロセスで2回実行し、結果が同じか確かめる）
+
+configs.jsonの形式（省略した項目はGameの既定値を使う）
+    {"設定名": {"waves": [waves.jsonの"waves"と同じ形式], "score_thresholds": [90, 500, 1000, 4000]}, ...}
+"""
+import argparse
+import csv
+import gc
+import json
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pygame as pg
+
+import headless
+import survive
+from inputs import KeyState
+
+
+class BotInput:
+    """
+    近くの敵から離れるように移動し、一番近い敵を狙うボットの入力を返すクラス
+    """
+
+    # この距離[px]以内の敵から離れる
+    AVOID_DISTANCE = 400
+    # 移動できる範囲の端からこの距離[px]以内に入ったら中心に戻る
+    EDGE_MARGIN = 300
+
+    def __init__(self, max_frames: int) -> None:
+        """
+        引数1: このフレーム数に達したらQUITイベントを発生させる
+        """
+        self.max_frames = max_frames
+        self.frame = 0
+        # 入力を決めるために参照するゲーム（生成後に設定する）
+        self.game: survive.Game | None = None
+
+    def poll(self) -> tuple[list[pg.event.Event], KeyState, tuple[int, int]]:
+        """
+        1フレーム分の入力を取得する関数
+        戻り値: (イベントのリスト, 押下キーの状態, マウス座標)
+        """
+        pg.event.pump()
+        events: list[pg.event.Event] = []
+        if self.frame >= self.max_frames:
+            events.append(pg.event.Event(pg.QUIT))
+        self.frame += 1
+        game = self.game
+        px, py = game.player.rect.center
+        area = pg.Rect(px - self.AVOID_DISTANCE, py - self.AVOID_DISTANCE, self.AVOID_DISTANCE * 2, self.AVOID_DISTANCE * 2)
+
+        # 近くの敵から離れる向きと、一番近い敵を求める
+        away_x = away_y = 0.0
+        nearest = None
+        nearest_dist = math.inf
+        for enemy in game.enemies.spatial_index.query(area):
+            if enemy not in game.enemies:
+                continue
+            dx, dy = px - enemy.rect.centerx, py - enemy.rect.centery
+            dist = math.hypot(dx, dy)
+            if dist < nearest_dist:
+                nearest, nearest_dist = enemy, dist
+            if 0 < dist < self.AVOID_DISTANCE:
+                away_x += dx / (dist * dist)
+                away_y += dy / (dist * dist)
+
+        # 端に近づいたら中心に戻る
+        half_width = survive.MoveArea.width / 2 - self.EDGE_MARGIN
+        half_height = survive.MoveArea.height / 2 - self.EDGE_MARGIN
+        if abs(px) > half_width:
+            away_x = -px
+        if abs(py) > half_height:
+            away_y = -py
+
+        keys = []
+        if away_x > 0:
+            keys.append(pg.K_d)
+        elif away_x < 0:
+            keys.append(pg.K_a)
+        if away_y > 0:
+            keys.append(pg.K_s)
+        elif away_y < 0:
+            keys.append(pg.K_w)
+
+        # マウスは画面中心をプレイヤーの位置とした画面座標
+        width, height = game.screen.get_size()
+        if nearest is None or nearest_dist == 0:
+            mouse_pos = (width // 2 + 300, height // 2)
+        else:
+            center_x, center_y = game.camera.center_pos
+            mouse_pos = (int(nearest.rect.centerx - center_x + width / 2), int(nearest.rect.centery - center_y + height / 2))
+        return events, KeyState(keys), mouse_pos
+
+    def frame_time(self, dtime: float) -> float:
+        return dtime
+
+
+# 実行時間に依存する列（同じシードでも一致しないので、再現性の確認では比べない）
+TIMING_COLUMNS = ("worst_frame_ms", "p99_frame_ms")
+# ワーカーの準備で実行するフレーム数（弾の回転画像・文字・効果音などのキャッシュを作るため）
+WARM_UP_FRAMES = 300
+
+
+def warm_up_worker(render: bool) -> None:
+    """
+    ワーカープロセスの最初に、全ての画像と各種キャッシュを用意しておく関数（ProcessPoolExecutorのinitializer）
+    キャッシュの無い最初の1回だけフレーム時間が長くなり、どの回に当たったかで最悪フレーム時間が変わるのを防ぐ
+    引数1: 描画も行うかどうか
+    """
+    game = headless.create_game(0, WARM_UP_FRAMES, dtime=1 / 60, render=render)
+    survive.preload_images()
+    game.run()
+
+
+def run_one(name: str, config: dict[str, Any], seed: int, render: bool) -> dict[str, Any]:
+    """
+    1回分のゲームを実行して結果を返す関数（ワーカープロセスで呼ばれる）
+    オブジェクトプールはGameの生成時に空になるので、同じプロセスで前に実行した回の影響を受けない
+    引数1: 設定名
+    引数2: Gameに渡す設定
+    引数3: 乱数のシード
+    引数4: 描画も行うかどうか
+    """
+    # 前の回のゴミを片付けておき、どの回も同じ状態からGCが始まるようにする（前の回のゴミで途中に重いGCが起きないように）
+    gc.collect()
+    max_frames = int(survive.Game.SURVIVE_TIME_SEC * 60) + 60
+    bot = BotInput(max_frames)
+    game = headless.create_game(seed, max_frames, dtime=1 / 60, render=render, **config)
+    game.input = bot
+    bot.game = game
+    peak_entities = 0
+
+    def hook(game: survive.Game) -> None:
+        nonlocal peak_entities
+        peak_entities = max(peak_entities, game.entity_count())
+
+    game.run(hook)
+    summary = game.profiler.summary()
+    return {
+        "config": name,
+        "seed": seed,
+        "survived": game.player.hp > 0 and game.suvive_time_tmr >= game.SURVIVE_TIME_SEC,
+        "survive_sec": min(game.suvive_time_tmr, game.SURVIVE_TIME_SEC),
+        "score": game.score.score,
+        "peak_entities": peak_entities,
+        "worst_frame_ms": summary.get("max_ms", 0.0),
+        "p99_frame_ms": summary.get("p99_ms", 0.0),
+    }
+
+
+def check_repeat(name: str, config: dict[str, Any], seed: int, render: bool) -> bool:
+    """
+    同じシードを同じプロセスで2回実行し、実行時間以外の結果が一致するかを確かめる関数
+    戻り値: 一致したらTrue
+    """
+    warm_up_worker(render)
+    first = run_one(name, config, seed, render)
+    second = run_one(name, config, seed, render)
+    different = [column for column in first if column not in TIMING_COLUMNS and first[column] != second[column]]
+    print(f"{name} seed {seed}: {first}")
+    print(f"{name} seed {seed}: {second}")
+    if different:
+        print(f"not reproducible: {', '.join(different)} differ")
+    return not different
+
+
+def aggregate(runs: list[dict[str, Any]]) -> dict[str, list]:
+    """
+    1回ごとの結果を設定ごとに集計する関数
+    戻り値: 列名: 値のリスト（設定ごとに1行）
+    """
+    by_config: dict[str, list[dict[str, Any]]] = {}
+    for run in runs:
+        by_config.setdefault(run["config"], []).append(run)
+
+    columns: dict[str, list] = {name: [] for name in (
+        "config", "runs", "survival_rate", "survive_sec_mean", "score_mean", "score_p50", "score_min", "score_max",
+        "peak_entities_mean", "peak_entities_max", "worst_frame_ms_p95", "worst_frame_ms_max")}
+    for name, config_runs in by_config.items():
+        scores = [run["score"] for run in config_runs]
+        peaks = [run["peak_entities"] for run in config_runs]
+        worst = sorted(run["worst_frame_ms"] for run in config_runs)
+        columns["config"].append(name)
+        columns["runs"].append(len(config_runs))
+        columns["survival_rate"].append(sum(run["survived"] for run in config_runs) / len(config_runs))
+        columns["survive_sec_mean"].append(statistics.fmean(run["survive_sec"] for run in config_runs))
+        columns["score_mean"].append(statistics.fmean(scores))
+        columns["score_p50"].append(statistics.median(scores))
+        columns["score_min"].append(min(scores))
+        columns["score_max"].append(max(scores))
+        columns["peak_entities_mean"].append(statistics.fmean(peaks))
+        columns["peak_entities_max"].append(max(peaks))
+        columns["worst_frame_ms_p95"].append(worst[min(len(worst) - 1, int(len(worst) * 0.95))])
+        columns["worst_frame_ms_max"].append(worst[-1])
+    return columns
+
+
+def write_columns(path: str, columns: dict[str, list]) -> None:
+    """
+    列ごとのデータを書き出す関数。拡張子が.parquetならpyarrowで、それ以外はCSVで書き出す
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("writing .parquet requires pyarrow (pip install pyarrow)")
+        pq.write_table(pa.table(columns), path)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*columns.values()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run many seeded bot games in parallel and aggregate the results per configuration.")
+    parser.add_argument("--runs", type=int, default=100, help="runs per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="first random seed (runs use seed, seed + 1, ...)")
+    parser.add_argument("--configs", help="JSON file of named Game options (default: waves.json and the built-in score thresholds)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--render", action="store_true", help="also draw every frame (frame times include rendering)")
+    parser.add_argument("--output", default="batch_results.csv", help="aggregated results (.csv, or .parquet with pyarrow)")
+    parser.add_argument("--runs-output", help="also write one row per run to this file")
+    parser.add_argument("--check-repeat", action="store_true",
+                        help="run --seed of each configuration twice in this process and exit non-zero if the results differ")
+    args = parser.parse_args()
+
+    configs: dict[str, dict[str, Any]] = {"default": {}}
+    if args.configs:
+        with open(args.configs) as f:
+            configs = json.load(f)
+
+    if args.check_repeat:
+        results = [check_repeat(name, config, args.seed, args.render) for name, config in configs.items()]
+        raise SystemExit(0 if all(results) else 1)
+
+    jobs = [(name, config, args.seed + i, args.render) for name, config in configs.items() for i in range(args.runs)]
+    with ProcessPoolExecutor(args.workers, initializer=warm_up_worker, initargs=(args.render,)) as executor:
+        runs = list(executor.map(run_one, *zip(*jobs), chunksize=max(1, len(jobs) // (args.workers * 8))))
+
+    columns = aggregate(runs)
+    write_columns(args.output, columns)
+    if args.runs_output:
+        write_columns(args.runs_output, {name: [run[name] for run in runs] for name in runs[0]})
+    for row in zip(*columns.values()):
+        print(dict(zip(columns, row)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+当たり判定の総当たり方式とSpatialHash方式の処理時間を比較するベンチマーク
+使い方: python benchmarks/bench_collision.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame as pg
+
+import spatial
+from spatial import SpatialHash
+
+# MoveAreaと同じ広さのワールドにランダムに配置する
+WORLD_WIDTH = 4000
+WORLD_HEIGHT = 3000
+ENTITY_COUNTS = (100, 1000, 5000)
+BULLET_COUNT = 90
+FLAME_COUNT = 50
+REPEAT = 20
+
+
+def make_group(count: int, size: tuple[int, int]) -> pg.sprite.Group:
+    group = pg.sprite.Group()
+    for _ in range(count):
+        sprite = pg.sprite.Sprite()
+        sprite.rect = pg.Rect(0, 0, *size)
+        sprite.rect.center = (random.randint(-WORLD_WIDTH // 2, WORLD_WIDTH // 2),
+                              random.randint(-WORLD_HEIGHT // 2, WORLD_HEIGHT // 2))
+        group.add(sprite)
+    return group
+
+
+def run_frame(player: pg.sprite.Sprite, enemies: pg.sprite.Group, bullets: pg.sprite.Group, flame: pg.sprite.Group) -> int:
+    """
+    main()と同じ3種類の当たり判定を1フレーム分行う関数
+    戻り値: 当たった数
+    """
+    count = 0
+    if getattr(enemies, "spatial_index", None) is not None:
+        enemies.spatial_index.build(enemies)
+    count += len(spatial.spritecollide(player, enemies))
+    for bullet in bullets:
+        count += len(spatial.spritecollide(bullet, enemies))
+    if getattr(bullets, "spatial_index", None) is not None:
+        bullets.spatial_index.build(bullets)
+    count += len(spatial.groupcollide(flame, bullets, False, False))
+    return count
+
+
+def measure(count: int, use_index: bool) -> tuple[float, int]:
+    random.seed(count)
+    player = make_group(1, (58, 77)).sprites()[0]
+    enemies = make_group(count, (120, 120))
+    bullets = make_group(BULLET_COUNT, (20, 10))
+    flame = make_group(FLAME_COUNT, (100, 100))
+    if use_index:
+        enemies.spatial_index = SpatialHash()
+        bullets.spatial_index = SpatialHash()
+    hits = 0
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        hits = run_frame(player, enemies, bullets, flame)
+    return (time.perf_counter() - start) / REPEAT * 1000, hits
+
+
+def main() -> None:
+    print(f"{'entities':>8} {'brute[ms]':>10} {'spatial[ms]':>12} {'speedup':>8}")
+    for count in ENTITY_COUNTS:
+        brute_ms, brute_hits = measure(count, False)
+        grid_ms, grid_hits = measure(count, True)
+        assert brute_hits == grid_hits, (brute_hits, grid_hits)
+        print(f"{count:>8} {brute_ms:>10.3f} {grid_ms:>12.3f} {brute_ms / grid_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+決まったシナリオでゲームをヘッドレス実行し、フレーム時間の統計をJSONで出力するベンチマーク
+使い方: python benchmarks/bench_frames.py [--scenario NAME ...] [--output result.json]
+"""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import argparse
+import json
+import random
+from typing import Callable
+
+import pygame as pg
+
+import headless
+import survive
+
+# シナリオ名: (開始時の生存時間[秒], フレーム数, 毎フレーム呼ぶ関数)
+Scenario = tuple[float, int, Callable[[survive.Game], None] | None]
+
+
+def keep_enemy_count(count: int) -> Callable[[survive.Game], None]:
+    """
+    敵の数がcount体になるまでMoveArea内のランダムな位置に敵を追加し続ける関数を返す関数
+    """
+    def hook(game: survive.Game) -> None:
+        game.is_stop_time = True
+        for _ in range(count - len(game.enemies)):
+            game.spawn_enemy("normal", [random.randint(-survive.MoveArea.width // 2, survive.MoveArea.width // 2),
+                                        random.randint(-survive.MoveArea.height // 2, survive.MoveArea.height // 2)])
+    return hook
+
+
+def triple_shot(game: survive.Game) -> None:
+    """
+    スコアを最後の閾値まで上げ、最短間隔で3発ずつ撃たせる
+    """
+    game.score.score = max(game.score.score, game.score_thresholds[-1])
+    game.player.attack_interval = 0.1
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "wave_0s": (0, 600, None),
+    "wave_10s": (10, 600, None),
+    "wave_30s": (30, 600, None),
+    "wave_45s": (45, 600, None),
+    "full_60s": (0, 3700, None),
+    "enemies_1k": (0, 300, keep_enemy_count(1000)),
+    "enemies_5k": (0, 300, keep_enemy_count(5000)),
+    "triple_shot": (30, 600, triple_shot),
+}
+
+
+def run_scenario(name: str, seed: int = 0) -> dict:
+    """
+    シナリオを1回実行して統計を返す関数
+    引数1: シナリオ名
+    引数2: 乱数のシード
+    """
+    start_sec, frames, hook = SCENARIOS[name]
+    game = headless.create_game(seed, frames)
+    game.suvive_time_tmr = start_sec
+    game.is_muteki = True
+    peak_entities = 0
+
+    def frame_hook(game: survive.Game) -> None:
+        nonlocal peak_entities
+        if hook is not None:
+            hook(game)
+        peak_entities = max(peak_entities, game.entity_count())
+
+    game.run(frame_hook)
+    result = game.profiler.summary()
+    result["peak_entities"] = peak_entities
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run headless frame-time benchmark scenarios.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", help="write JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = {name: run_scenario(name, args.seed) for name in (args.scenario or SCENARIOS)}
+    text = json.dumps({"seed": args.seed, "scenarios": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
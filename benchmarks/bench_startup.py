@@ -0,0 +1,68 @@
+"""
+起動から最初のフレームを表示するまでの時間と、全ての画像を読み込むまでの時間を
+アトラスを使う場合と使わない場合で計測するベンチマーク（事前にbake_atlas.pyを実行しておくこと）
+ゲームと同じくsurvive.mainの起動処理（AssetLoaderでの読み込み・読み込み画面）を通し、--measure-startupの結果を集計する
+使い方: python benchmarks/bench_startup.py [--repeat 5]
+"""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import subprocess
+
+
+def child(atlas: bool) -> None:
+    """
+    新しいプロセスの中でsurvive.mainを最初のフレームまで実行し、各段階までの時間[ms]をJSONで出力する
+    """
+    # pygameの読み込みも計測に含めるため、survive（STARTUP_TIMEを記録してからpygameを読み込む）を先に読み込む
+    import survive
+    import pygame as pg
+    from assets import Assets
+
+    report = io.StringIO()
+    with contextlib.redirect_stdout(report):
+        survive.main(measure_startup=True, atlas=atlas)
+    result = json.loads(report.getvalue()[report.getvalue().index("{"):])
+    result["decoded"] = Assets.misses
+    print(json.dumps(result))
+    pg.quit()
+
+
+def measure(atlas: bool, repeat: int) -> dict:
+    """
+    別プロセスでrepeat回起動し、各値の中央値を返す関数
+    """
+    runs = []
+    for _ in range(repeat):
+        command = [sys.executable, os.path.abspath(__file__), "--child"] + ([] if atlas else ["--no-atlas"])
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure time to first frame with and without the baked atlas.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of process launches per mode")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-atlas", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(not args.no_atlas)
+        return
+    print(json.dumps({"png": measure(False, args.repeat), "atlas": measure(True, args.repeat)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+敵の移動を各Spriteのupdateで行う場合とSwarmでまとめて行う場合の処理時間を比較するベンチマーク
+（どちらもGame.updateの敵の更新と同じ処理で、Swarmの設定もGameと同じ）
+続けて、同じ数の敵を置いたヘッドレスのGameで1フレーム全体（更新・当たり判定・描画）の時間を計測する
+使い方: python benchmarks/bench_swarm.py
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame as pg
+from pygame.rect import Rect
+
+import headless
+import survive
+from lod import SimulationLOD
+from swarm import HAS_NUMPY, Swarm
+
+ENEMY_COUNTS = (100, 1000, 10000)
+FRAMES = 30
+DTIME = 1 / 60
+# 1フレーム全体を計測するフレーム数と、60FPSの1フレームの予算[ms]
+GAME_FRAMES = 120
+FRAME_BUDGET_MS = 1000 / 60
+# Profilerの区間のうち描画にあたるもの（残りは更新）
+RENDER_PHASES = ("draw", "hud", "present")
+
+
+def measure(count: int, use_swarm: bool) -> tuple[float, float]:
+    """
+    戻り値: (敵の更新の1フレーム平均[ms], そのうちswarm.stepの時間[ms])
+    """
+    random.seed(count)
+    screen = pg.display.set_mode((survive.WIDTH, survive.HEIGHT))
+    effect_group = survive.Group_support_camera()
+    player = survive.Player([0, 0], effect_group)
+    camera = survive.Camera(screen, player)
+    swarm = None
+    if use_swarm:
+        move_area = Rect(-survive.MoveArea.width // 2, -survive.MoveArea.height // 2,
+                         survive.MoveArea.width, survive.MoveArea.height)
+        swarm = Swarm(flow_area=move_area, flow_cell_size=survive.Game.FLOW_CELL_SIZE,
+                      separation=survive.Game.SEPARATION_SPEED,
+                      lod=SimulationLOD(survive.Game.LOD_RINGS, survive.Game.LOD_INTERVALS))
+    enemies = survive.Group_support_camera()
+    for _ in range(count):
+        pos = (random.randint(-survive.MoveArea.width // 2, survive.MoveArea.width // 2),
+               random.randint(-survive.MoveArea.height // 2, survive.MoveArea.height // 2))
+        enemies.add(survive.Enemy(pos, player, effect_group, swarm=swarm))
+    total = move = 0.0
+    for _ in range(FRAMES):
+        start = time.perf_counter()
+        if swarm is not None:
+            # Game.updateと同じく、移動はまとめて行い、画像の切り替えは近くの敵だけ行う
+            swarm.step(DTIME, camera.view_rect(Swarm.SYNC_MARGIN))
+            mid = time.perf_counter()
+            for enemy in swarm.near:
+                enemy.update(DTIME)
+        else:
+            enemies.update(DTIME)
+            mid = time.perf_counter()
+        end = time.perf_counter()
+        total += end - start
+        move += mid - start
+    return total / FRAMES * 1000, move / FRAMES * 1000
+
+
+def measure_game(count: int) -> dict[str, float]:
+    """
+    敵をcount体置いたヘッドレスのGameをGAME_FRAMESフレーム実行し、1フレーム平均の時間[ms]を返す関数
+    敵はMoveArea内のランダムな位置に実行前にまとめて生成し、ウェーブでの追加は止める
+    戻り値: frame（1フレーム全体）, p99, update（入力を含み、collisionを除く更新）, collision, render
+    """
+    game = headless.create_game(count, GAME_FRAMES)
+    game.is_stop_time = True
+    game.is_muteki = True
+    for _ in range(count):
+        game.spawn_enemy("normal", [random.randint(-survive.MoveArea.width // 2, survive.MoveArea.width // 2),
+                                    random.randint(-survive.MoveArea.height // 2, survive.MoveArea.height // 2)])
+    game.run()
+    summary = game.profiler.summary()
+    phases = summary["phases_ms"]
+    render = sum(phases.get(name, 0.0) for name in RENDER_PHASES)
+    collision = phases.get("collision", 0.0)
+    return {"frame": summary["mean_ms"], "p99": summary["p99_ms"],
+            "update": sum(phases.values()) - render - collision, "collision": collision, "render": render}
+
+
+def main() -> None:
+    pg.init()
+    if not HAS_NUMPY:
+        print("numpy is not installed")
+        return
+    print(f"{'enemies':>8} {'sprite update[ms]':>18} {'swarm update[ms]':>17} {'swarm step[ms]':>15}")
+    for count in ENEMY_COUNTS:
+        legacy_ms, _ = measure(count, False)
+        swarm_ms, step_ms = measure(count, True)
+        print(f"{count:>8} {legacy_ms:>18.3f} {swarm_ms:>17.3f} {step_ms:>15.3f}")
+    print()
+    print(f"{'enemies':>8} {'frame[ms]':>10} {'p99[ms]':>8} {'update[ms]':>11} {'collision[ms]':>14} {'render[ms]':>11} {'60fps':>6}")
+    for count in ENEMY_COUNTS:
+        result = measure_game(count)
+        meets = "yes" if result["frame"] <= FRAME_BUDGET_MS else "no"
+        print(f"{count:>8} {result['frame']:>10.3f} {result['p99']:>8.3f} {result['update']:>11.3f} "
+              f"{result['collision']:>14.3f} {result['render']:>11.3f} {meets:>6}")
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+銃弾とボスの攻撃をECSで持つ場合と各Spriteで持つ場合で、同じ場面の当たり判定の結果が一致するかを確かめるスクリプト
+（倒れることが決まった相手を銃弾・ボスの攻撃が通り抜けるか、炎と銃弾が相殺されるか）
+使い方: python check_projectiles.py（一致しなければ終了コード1）
+"""
+import pygame as pg
+
+import headless
+import survive
+from assets import Assets
+from swarm import HAS_NUMPY
+
+# 1ステップの経過時間と、1ステップにちょうど整数ピクセル進む速さ（Rectの切り捨てで差が出ないようにする）
+DTIME = 1 / 60
+BULLET_SPEED = 480
+FLAME_SPEED = 240
+STEPS = 120
+
+
+def run_scenario(ecs_projectiles: bool) -> list[tuple]:
+    """
+    プレイヤーの周りに敵・銃弾・炎を置いてSTEPSステップ進め、ステップごとの状態を返す関数
+    1段目: hp20の敵に同時に3発（2発で倒れるので3発目は通り抜け、後ろのhp10の敵を倒す）
+    2段目: hp10のプレイヤーに同時に炎2つ（1つ目で倒れるので2つ目は通り抜ける）
+    3段目: 向かい合う銃弾と炎（ぶつかって両方消える）
+    引数1: Falseなら銃弾とボスの攻撃を各Spriteで持つ
+    戻り値: (プレイヤーのhp, 敵のhp, 銃弾の数, 炎の数, スコア)のリスト
+    """
+    game = headless.create_game(seed=0, render=False, profile=False, ecs_projectiles=ecs_projectiles)
+    for enemy in game.enemies.sprites():
+        enemy.kill()
+    player = game.player
+    player.hp = 10
+    x, y = player.rect.center
+    enemy_image = Assets.scaled("./fig/zonbi1.png", (survive.Enemy.IMAGE_SIZES[0], survive.Enemy.IMAGE_SIZES[0]))
+    enemies = [survive.Enemy.create((x + 200, y - 300), player, game.effect_group, hp=20, image=enemy_image),
+               survive.Enemy.create((x + 400, y - 300), player, game.effect_group, hp=10, image=enemy_image)]
+    game.enemies.add(*enemies)
+
+    bullet_image = game.player_bullet_image()
+    flame_image = Assets.transform("./fig/flame.png", 0.1)
+    player_group = player.groups()[0]
+    for _ in range(3):
+        survive.Bullet.spawn(game.bullets, bullet_image, (x - 100, y - 300), (1, 0), game.enemies, BULLET_SPEED)
+    for _ in range(2):
+        survive.Bullet.spawn(game.flame, flame_image, (x - 300, y), (1, 0), player_group, FLAME_SPEED,
+                             is_fix_rotation_img=True, life_sec=10, image_angle=90)
+    survive.Bullet.spawn(game.bullets, bullet_image, (x - 200, y + 300), (1, 0), game.enemies, BULLET_SPEED)
+    survive.Bullet.spawn(game.flame, flame_image, (x + 200, y + 300), (-1, 0), player_group, FLAME_SPEED,
+                         is_fix_rotation_img=True, life_sec=10, image_angle=90)
+
+    states = []
+    for _ in range(STEPS):
+        game.enemies.spatial_index.build(game.enemies)
+        game.update_projectiles(DTIME)
+        game.resolve_damage()
+        states.append((player.hp, tuple(enemy.hp for enemy in enemies), len(game.bullets), len(game.flame),
+                       game.score.score))
+    return states
+
+
+def main() -> None:
+    if not HAS_NUMPY:
+        print("NumPy is not installed; projectiles always use sprites")
+        return
+    sprite_states = run_scenario(False)
+    ecs_states = run_scenario(True)
+    pg.quit()
+    print(f"sprite: {sprite_states[-1]}")
+    print(f"ecs:    {ecs_states[-1]}")
+    for step, (sprite_state, ecs_state) in enumerate(zip(sprite_states, ecs_states)):
+        if sprite_state != ecs_state:
+            print(f"step {step}: sprite {sprite_state} != ecs {ecs_state}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
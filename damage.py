@@ -0,0 +1,67 @@
+"""
+当たり判定で起きたダメージを溜めておき、1ステップに1回まとめて適用するモジュール
+"""
+from typing import Any
+
+from pygame.sprite import Sprite
+
+
+class DamageEvents:
+    """
+    当たり判定の間は（ダメージを与える相手, ダメージ, 原因）を記録するだけにし、resolveで相手ごとにまとめてダメージを与えるクラス
+    相手はCharacter（hp・max_invincible_tick・give_damageを持つもの）
+    """
+
+    def __init__(self) -> None:
+        self._events: list[tuple[Sprite, int, Any]] = []
+        # 相手ごとのこのステップのダメージ（最初に当たった順）
+        self._totals: dict[Sprite, int] = {}
+        # 直前のresolveで処理した当たりの数と相手の数
+        self.event_count = 0
+        self.target_count = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def hit(self, target: Sprite, damage: int, source: Any = None) -> None:
+        """
+        当たりを記録する関数（ダメージはresolveで与える）
+        同じ相手への複数の当たりは、ダメージを受けると無敵になる相手なら最初の1つだけ、それ以外は合計を与える
+        引数1: ダメージを与える相手
+        引数2: ダメージ
+        引数3: 当たったもの（銃弾・敵など。任意）
+        """
+        self._events.append((target, damage, source))
+        total = self._totals.get(target)
+        if total is None:
+            self._totals[target] = damage
+        elif target.max_invincible_tick <= 0:
+            self._totals[target] = total + damage
+
+    def is_doomed(self, target: Sprite) -> bool:
+        """
+        相手が既に倒れているか、記録済みのダメージでこのステップに倒れるかどうかを返す関数
+        （当たり判定の途中で、倒れる相手にそれ以上の銃弾・ボスの攻撃を当てないために使う）
+        """
+        return target.hp <= self._totals.get(target, 0)
+
+    def resolve(self) -> list[Sprite]:
+        """
+        記録した当たりを相手ごとにまとめてダメージを与える関数（1ステップの当たり判定が全て終わった後に呼ぶ）
+        戻り値: このダメージで倒れた相手のリスト（最初に当たった順）
+        """
+        self.event_count = len(self._events)
+        self.target_count = len(self._totals)
+        if not self._events:
+            return []
+        totals = self._totals
+        self._events = []
+        self._totals = {}
+        killed = []
+        for target, damage in totals.items():
+            # 既に倒れている相手には与えない（スコアを二重に数えないため）
+            if target.hp <= 0:
+                continue
+            if target.give_damage(damage) <= 0:
+                killed.append(target)
+        return killed
@@ -0,0 +1,86 @@
+"""
+画面のうち前のフレームから変わった範囲だけをディスプレイに転送するためのモジュール
+"""
+import pygame as pg
+from pygame.rect import Rect
+
+
+class DirtyRects:
+    """
+    レイヤー（背景・キャラ・エフェクト・UI）ごとに描画した範囲を記録し、
+    前のフレームと今のフレームで描画した範囲だけをpg.display.updateに渡すクラス
+    変わった範囲の面積が画面の一定割合を超えたら画面全体を更新する
+    """
+
+    LAYERS = ("background", "entities", "effects", "hud")
+
+    def __init__(self, screen_rect: Rect, threshold: float = 0.5, enabled: bool = True) -> None:
+        """
+        引数1: 画面の範囲
+        引数2: 変わった範囲の面積が画面のこの割合を超えたら画面全体を更新する
+        引数3: Falseなら常に画面全体を更新する
+        """
+        self.screen_rect = Rect(screen_rect)
+        self.threshold = threshold
+        self.enabled = enabled
+        self._current: dict[str, list[Rect]] = {layer: [] for layer in self.LAYERS}
+        self._previous: dict[str, list[Rect]] = {layer: [] for layer in self.LAYERS}
+        # 次のpresentで画面全体を更新するかどうか（最初のフレームは必ず全体）
+        self._full = True
+        # 直前のpresentで転送した範囲の数と画面に対する面積の割合
+        self.rect_count = 0
+        self.area_ratio = 1.0
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    def add(self, layer: str, rects: list[Rect]) -> None:
+        """
+        今のフレームでlayerに描画した範囲（画面座標）を記録する関数
+        """
+        self._current[layer].extend(rects)
+
+    def add_rect(self, layer: str, rect: Rect | None) -> None:
+        """
+        今のフレームでlayerに描画した範囲を1つ記録する関数（Noneなら何もしない）
+        """
+        if rect is not None:
+            self._current[layer].append(rect)
+
+    def invalidate(self) -> None:
+        """
+        次のpresentで画面全体を更新させる関数（背景のスクロールや画面の切り替え時に呼ぶ）
+        """
+        self._full = True
+
+    def present(self) -> None:
+        """
+        記録した範囲をディスプレイに転送し、今のフレームの範囲を次のフレーム用に残す関数
+        """
+        rects = []
+        if self.enabled and not self._full:
+            # 前のフレームで描いた場所も消すために転送する
+            clip = self.screen_rect.clip
+            for layer in self.LAYERS:
+                # 背景は毎フレーム画面全体に描き直すので前のフレームの範囲を消す必要は無い
+                if layer != "background":
+                    rects.extend(clip(rect) for rect in self._previous[layer])
+                rects.extend(clip(rect) for rect in self._current[layer])
+            area = sum(rect.width * rect.height for rect in rects)
+            self.area_ratio = area / (self.screen_rect.width * self.screen_rect.height)
+            if self.area_ratio > self.threshold:
+                self._full = True
+
+        if self.enabled and not self._full:
+            pg.display.update(rects)
+            self.rect_count = len(rects)
+            self.partial_updates += 1
+        else:
+            pg.display.update()
+            self.rect_count = 1
+            self.area_ratio = 1.0
+            self.full_updates += 1
+
+        self._previous, self._current = self._current, self._previous
+        for rects in self._current.values():
+            rects.clear()
+        self._full = False
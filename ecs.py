@@ -0,0 +1,267 @@
+"""
+エンティティの状態を種類（アーキタイプ）ごとに型付きの配列へ詰めて持ち、
+システム関数でまとめて処理するエンティティ・コンポーネント・システムのモジュール（NumPyが必要）
+対象は寿命で消える飛び道具（銃弾・ボスの攻撃）だけで、システムは移動・寿命・当たり判定・描画のみ
+HP・無敵時間・ダメージ・タイマーを持つキャラクタ（Player・敵・ボス）は引き続きSpriteのクラスが持つ
+"""
+from typing import Any, Iterable
+
+from pygame.rect import Rect
+from pygame.sprite import AbstractGroup, Sprite
+from pygame.surface import Surface
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Archetype:
+    """
+    同じ構成要素（コンポーネント）を持つエンティティの状態を、構成要素ごとの配列に詰めて持つクラス
+    i行目がids[i]のエンティティの状態で、外したエンティティの行には末尾の行を詰める
+    """
+
+    def __init__(self, name: str, components: dict[str, tuple[str, tuple[int, ...]]], capacity: int = 256) -> None:
+        """
+        引数1: 名前
+        引数2: 構成要素の名前: (型, 1体分の形)
+        引数3: 最初に確保しておく数
+        """
+        self.name = name
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.columns: dict[str, np.ndarray] = {
+            component: np.zeros((capacity,) + shape, dtype=dtype) for component, (dtype, shape) in components.items()
+        }
+        self._rows: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._rows
+
+    def __getitem__(self, component: str) -> "np.ndarray":
+        """
+        構成要素の配列のうち使っている行だけを返す関数（書き換えると状態が変わる）
+        """
+        return self.columns[component][:self.count]
+
+    def row(self, entity: int) -> int | None:
+        return self._rows.get(entity)
+
+    def _grow(self) -> None:
+        capacity = len(self.ids) * 2
+        for name, old in [("ids", self.ids)] + list(self.columns.items()):
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            if name == "ids":
+                self.ids = new
+            else:
+                self.columns[name] = new
+
+    def add(self, entity: int, values: dict[str, Any]) -> int:
+        """
+        エンティティの行を追加する関数（valuesに無い構成要素は0）
+        戻り値: 追加した行
+        """
+        if self.count == len(self.ids):
+            self._grow()
+        row = self.count
+        self.ids[row] = entity
+        for name, column in self.columns.items():
+            column[row] = values.get(name, 0)
+        self._rows[entity] = row
+        self.count += 1
+        return row
+
+    def remove(self, entity: int) -> bool:
+        """
+        エンティティの行を外す関数
+        戻り値: 外したならTrue（既に無ければFalse）
+        """
+        row = self._rows.pop(entity, None)
+        if row is None:
+            return False
+        last = self.count - 1
+        if row != last:
+            self.ids[row] = self.ids[last]
+            for column in self.columns.values():
+                column[row] = column[last]
+            self._rows[int(self.ids[row])] = row
+        self.count = last
+        return True
+
+
+class World:
+    """
+    アーキタイプと、エンティティが使う画像を持つクラス
+    エンティティは番号で表し、画像は番号（ハンドル）で構成要素の配列に入れる
+    """
+
+    def __init__(self) -> None:
+        if np is None:
+            raise RuntimeError("World requires numpy")
+        self.archetypes: dict[str, Archetype] = {}
+        self._where: dict[int, Archetype] = {}
+        self._next_entity = 1
+        self.images: list[Surface] = []
+        self._image_handles: dict[Surface, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def define(self, name: str, components: dict[str, tuple[str, tuple[int, ...]]]) -> Archetype:
+        """
+        アーキタイプを定義する関数
+        引数1: 名前
+        引数2: 構成要素の名前: (型, 1体分の形)
+        """
+        archetype = Archetype(name, components)
+        self.archetypes[name] = archetype
+        return archetype
+
+    def spawn(self, archetype: Archetype, **values: Any) -> int:
+        """
+        エンティティを生成する関数
+        引数1: アーキタイプ
+        残りの引数: 構成要素の初期値
+        戻り値: エンティティの番号
+        """
+        entity = self._next_entity
+        self._next_entity += 1
+        archetype.add(entity, values)
+        self._where[entity] = archetype
+        return entity
+
+    def despawn(self, entity: int) -> bool:
+        """
+        エンティティを消す関数
+        戻り値: 消したならTrue（既に消えていればFalse）
+        """
+        archetype = self._where.pop(entity, None)
+        return archetype is not None and archetype.remove(entity)
+
+    def is_alive(self, entity: int) -> bool:
+        return entity in self._where
+
+    def image_handle(self, image: Surface) -> int:
+        """
+        画像のハンドルを返す関数（初めての画像なら登録する）
+        """
+        handle = self._image_handles.get(image)
+        if handle is None:
+            handle = len(self.images)
+            self.images.append(image)
+            self._image_handles[image] = handle
+        return handle
+
+
+def movement_system(archetype: Archetype, delta_time: float) -> None:
+    """
+    全員を速度の分だけ移動させるシステム（構成要素: pos, vel）
+    """
+    pos = archetype["pos"]
+    pos += archetype["vel"] * delta_time
+
+
+def lifetime_system(world: World, archetype: Archetype, delta_time: float, view_rect: Rect | None = None) -> int:
+    """
+    残り時間を減らし、残り時間が尽きたエンティティを消すシステム（構成要素: life, 任意でcull, pos）
+    引数4: cullが真のエンティティは、中心がこの範囲の外に出たら消す
+    戻り値: 消した数
+    """
+    life = archetype["life"]
+    life -= delta_time
+    expired = life < 0
+    if view_rect is not None and "cull" in archetype.columns:
+        pos = archetype["pos"]
+        outside = ((pos[:, 0] < view_rect.left) | (pos[:, 0] > view_rect.right)
+                   | (pos[:, 1] < view_rect.top) | (pos[:, 1] > view_rect.bottom))
+        expired |= archetype["cull"] & outside
+    entities = archetype.ids[:archetype.count][expired].tolist()
+    for entity in entities:
+        world.despawn(entity)
+    return len(entities)
+
+
+def rects(archetype: Archetype, alpha: float = 1.0) -> tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    各エンティティの範囲（pygameのRectでcenterをposにした時と同じ）を返す関数（構成要素: pos, size, 任意でprev_pos）
+    引数2: prev_pos(0.0)からpos(1.0)までの補間率
+    戻り値: (左端, 上端, 幅, 高さ)の配列
+    """
+    pos = archetype["pos"]
+    if alpha < 1.0 and "prev_pos" in archetype.columns:
+        prev = archetype["prev_pos"]
+        pos = prev + (pos - prev) * alpha
+    size = archetype["size"]
+    width, height = size[:, 0], size[:, 1]
+    left = np.floor(pos[:, 0]).astype(np.int64) - width // 2
+    top = np.floor(pos[:, 1]).astype(np.int64) - height // 2
+    return left, top, width, height
+
+
+def overlapping(archetype: Archetype, rect: Rect) -> list[int]:
+    """
+    rectと重なっているエンティティの番号を返す関数
+    """
+    left, top, width, height = rects(archetype)
+    hit = (left < rect.right) & (left + width > rect.left) & (top < rect.bottom) & (top + height > rect.top)
+    return archetype.ids[:archetype.count][hit].tolist()
+
+
+def overlapping_pairs(a: Archetype, b: Archetype) -> tuple[list[int], list[int]]:
+    """
+    aとbのエンティティどうしで重なっているものを総当たりで求める関数（どちらも少ない時に使う）
+    戻り値: (bのどれかと重なっているaの番号, aのどれかと重なっているbの番号)
+    """
+    if a.count == 0 or b.count == 0:
+        return [], []
+    al, at, aw, ah = (v[:, None] for v in rects(a))
+    bl, bt, bw, bh = rects(b)
+    hit = (al < bl + bw) & (al + aw > bl) & (at < bt + bh) & (at + ah > bt)
+    return a.ids[:a.count][hit.any(axis=1)].tolist(), b.ids[:b.count][hit.any(axis=0)].tolist()
+
+
+def collide_sprites(archetype: Archetype, group: AbstractGroup) -> list[tuple[int, list[Sprite]]]:
+    """
+    エンティティとグループのSpriteの当たり判定を、グループのspatial_index（SpatialHash）で行う関数
+    戻り値: (エンティティの番号, 重なっているSpriteのリスト)のリスト（重なっているものだけ）
+    """
+    index = group.spatial_index
+    hits = []
+    for entity, left, top, width, height in zip(archetype.ids[:archetype.count].tolist(), *(v.tolist() for v in rects(archetype))):
+        targets = [sprite for sprite in index.collide(Rect(left, top, width, height)) if sprite in group]
+        if targets:
+            hits.append((entity, targets))
+    return hits
+
+
+def render_system(world: World, archetype: Archetype, surface: Surface, view_rect: Rect, alpha: float = 1.0) -> list[Rect]:
+    """
+    view_rectに映るエンティティだけを描画するシステム（構成要素: pos, size, image, 任意でprev_pos）
+    引数4: 描画する範囲（ワールド座標。左上がsurfaceの左上になる）
+    引数5: prev_pos(0.0)からpos(1.0)までの補間率
+    戻り値: 描画した範囲（画面座標）のリスト
+    """
+    left, top, width, height = rects(archetype, alpha)
+    visible = np.flatnonzero((left < view_rect.right) & (left + width > view_rect.left)
+                             & (top < view_rect.bottom) & (top + height > view_rect.top))
+    if len(visible) == 0:
+        return []
+    images = world.images
+    drawn = [Rect(x, y, w, h) for x, y, w, h in zip((left[visible] - view_rect.left).tolist(),
+                                                     (top[visible] - view_rect.top).tolist(),
+                                                     width[visible].tolist(), height[visible].tolist())]
+    surface.blits([(images[handle], rect) for handle, rect in zip(archetype["image"][visible].tolist(), drawn)], False)
+    return drawn
+
+
+def snapshot_system(archetypes: Iterable[Archetype]) -> None:
+    """
+    描画時の補間のために現在の位置を記録するシステム（構成要素: pos, prev_pos）
+    """
+    for archetype in archetypes:
+        archetype["prev_pos"][:] = archetype["pos"]
@@ -0,0 +1,130 @@
+"""
+移動できる範囲を格子に分け、各マスから目標へ向かう向きをまとめて求めておくフローフィールドのモジュール
+敵は自分のいるマスの向きを読むだけで良いので、経路計算の量は敵の数によらない（NumPyが必要）
+"""
+import math
+
+from pygame.rect import Rect
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 8方向の隣のマス (列の差, 行の差, 移動コスト)
+_NEIGHBORS = [(dx, dy, math.hypot(dx, dy)) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+class FlowField:
+    """
+    範囲を格子に分け、目標のマスからの距離と、各マスで進むべき向きを持つクラス
+    目標が別のマスに移った時だけ計算し直す
+    """
+
+    def __init__(self, area: Rect, cell_size: int = 100) -> None:
+        """
+        引数1: 格子で覆う範囲
+        引数2: マスの大きさ[px]
+        """
+        if np is None:
+            raise RuntimeError("FlowField requires numpy")
+        self.area = Rect(area)
+        self.cell_size = cell_size
+        self.cols = math.ceil(self.area.width / cell_size)
+        self.rows = math.ceil(self.area.height / cell_size)
+        # 通れないマス（障害物）。Trueのマスは避けて進む
+        self.blocked = np.zeros((self.rows, self.cols), dtype=bool)
+        # 目標のマスからの距離（マス単位）と、各マスで進む向きの単位ベクトル
+        self.distance = np.full((self.rows, self.cols), np.inf)
+        self.directions = np.zeros((self.rows, self.cols, 2))
+        # 各マスの列・行の番号
+        self._rows_index, self._cols_index = np.indices((self.rows, self.cols))
+        self.target_cell: tuple[int, int] | None = None
+        self.build_count = 0
+
+    def cell_of(self, pos: tuple[float, float]) -> tuple[int, int]:
+        """
+        位置posのマス（列, 行）を返す関数（範囲外なら端のマス）
+        """
+        col = int((pos[0] - self.area.left) // self.cell_size)
+        row = int((pos[1] - self.area.top) // self.cell_size)
+        return min(max(col, 0), self.cols - 1), min(max(row, 0), self.rows - 1)
+
+    def update(self, target_pos: tuple[float, float]) -> bool:
+        """
+        目標が別のマスに移っていれば計算し直す関数（毎フレーム呼んで良い）
+        引数1: 目標の位置
+        戻り値: 計算し直したならTrue
+        """
+        cell = self.cell_of(target_pos)
+        if cell == self.target_cell:
+            return False
+        self.build(cell)
+        return True
+
+    def build(self, target_cell: tuple[int, int]) -> None:
+        """
+        目標のマスから各マスへの（8方向に進む時の）最短距離を求め、距離が減る向きを各マスの向きにする関数
+        引数1: 目標のマス（列, 行）
+        """
+        cols, rows = self.cols, self.rows
+        self.distance = self._distances(target_cell)
+
+        # 距離の勾配（隣のマスとの距離の差で重み付けした向きの和）の逆向きに進む
+        padded = np.pad(self.distance, 1, constant_values=np.inf)
+        center = padded[1:-1, 1:-1]
+        flow = np.zeros((rows, cols, 2))
+        for dx, dy, cost in _NEIGHBORS:
+            neighbor = padded[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx]
+            gain = np.where(np.isfinite(neighbor) & np.isfinite(center), center - neighbor, 0.0)
+            gain = np.maximum(gain, 0.0) / cost
+            flow[..., 0] += gain * dx / cost
+            flow[..., 1] += gain * dy / cost
+        norm = np.hypot(flow[..., 0], flow[..., 1])
+        self.directions = flow / np.maximum(norm, 1e-9)[..., None]
+        self.target_cell = target_cell
+        self.build_count += 1
+
+    def _distances(self, target_cell: tuple[int, int]) -> "np.ndarray":
+        # 障害物が無ければ、縦横に1・斜めに√2で進む時の最短距離は式で求まる
+        tx, ty = target_cell
+        dx = np.abs(self._cols_index - tx)
+        dy = np.abs(self._rows_index - ty)
+        distance = np.maximum(dx, dy) + (math.sqrt(2) - 1) * np.minimum(dx, dy)
+        blocked = self.blocked
+        if not blocked.any():
+            return distance
+        # 障害物があれば、隣のマスからの距離で全マスをまとめて更新することを変わらなくなるまで繰り返す
+        rows, cols = self.rows, self.cols
+        padded_blocked = np.pad(blocked, 1, constant_values=True)
+        # 各方向の隣のマスから入って来られるかどうか（斜めは障害物の角をすり抜けない）
+        passable = []
+        for dx, dy, cost in _NEIGHBORS:
+            allowed = ~blocked
+            if dx and dy:
+                allowed = (allowed & ~padded_blocked[1:rows + 1, 1 + dx:cols + 1 + dx]
+                           & ~padded_blocked[1 + dy:rows + 1 + dy, 1:cols + 1])
+            passable.append((dx, dy, cost, allowed))
+        distance = np.full((rows, cols), np.inf)
+        distance[ty, tx] = 0.0
+        while True:
+            padded = np.pad(distance, 1, constant_values=np.inf)
+            relaxed = distance.copy()
+            for dx, dy, cost, allowed in passable:
+                neighbor = padded[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx]
+                np.minimum(relaxed, np.where(allowed, neighbor + cost, np.inf), out=relaxed)
+            if np.array_equal(relaxed, distance):
+                return distance
+            distance = relaxed
+
+    def sample(self, pos: "np.ndarray") -> "np.ndarray":
+        """
+        各位置のマスの向きを返す関数
+        引数1: 位置の配列 (n, 2)
+        戻り値: 向きの単位ベクトルの配列 (n, 2)（範囲外の位置は端のマスの向き）
+        """
+        cols = ((pos[:, 0] - self.area.left) // self.cell_size).astype(np.intp)
+        rows = ((pos[:, 1] - self.area.top) // self.cell_size).astype(np.intp)
+        np.clip(cols, 0, self.cols - 1, out=cols)
+        np.clip(rows, 0, self.rows - 1, out=rows)
+        return self.directions[rows, cols]
@@ -0,0 +1,90 @@
+"""
+フレーム時間が目標を超え続けたら品質を段階的に下げ、余裕が戻ったら元に戻すガバナーのモジュール
+"""
+from collections import deque
+from typing import Callable
+
+
+class FrameGovernor:
+    """
+    直近windowフレームの処理時間の平均を目標と比べ、品質の段階（level）を1つずつ上げ下げするクラス
+    levelが1以上の時はSTEPSの先頭からlevel個の軽量化を行う
+    """
+
+    # 品質を下げる順の軽量化の名前
+    #   sound: 効果音の同時再生数を減らす
+    #   hud: HPバーとデバッグ用の文字を描画しない
+    #   lod: 画面から遠い敵の移動の頻度をさらに下げる
+    #   spawn: 敵の数が上限に達したらスポーンさせない
+    STEPS = ("sound", "hud", "lod", "spawn")
+
+    def __init__(self,
+                 budget_sec: float = 1 / 60,
+                 window: int = 30,
+                 degrade_ratio: float = 1.0,
+                 restore_ratio: float = 0.6,
+                 cooldown: int = 60,
+                 on_change: Callable[[int, int], None] | None = None,
+                 log: Callable[[str], None] | None = print) -> None:
+        """
+        引数1: 1フレームの処理時間の目標[秒]
+        引数2: 平均を取るフレーム数
+        引数3: 平均が目標のこの倍率を超えたら品質を1段階下げる
+        引数4: 平均が目標のこの倍率を下回ったら品質を1段階戻す
+        引数5: 段階を変えてから次に変えるまでの最小フレーム数
+        引数6: 段階が変わった時に(前の段階, 新しい段階)で呼ぶ関数
+        引数7: 段階が変わったことを出力する関数（Noneなら出力しない）
+        """
+        self.budget_sec = budget_sec
+        self.degrade_ratio = degrade_ratio
+        self.restore_ratio = restore_ratio
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.log = log
+        self.level = 0
+        self._frame_secs: deque[float] = deque(maxlen=window)
+        self._frame = 0
+        self._last_change = 0
+        # 段階を変えた記録 (フレーム番号, 前の段階, 新しい段階, その時の平均[秒])
+        self.transitions: list[tuple[int, int, int, float]] = []
+
+    def active(self, step: str) -> bool:
+        """
+        軽量化stepを行っている段階かどうかを返す関数
+        """
+        return step in self.STEPS[:self.level]
+
+    def average(self) -> float:
+        return sum(self._frame_secs) / len(self._frame_secs) if self._frame_secs else 0.0
+
+    def observe(self, frame_sec: float) -> int:
+        """
+        1フレームの処理時間を記録し、必要なら段階を変える関数（毎フレーム呼ぶ）
+        引数1: 処理時間[秒]（フレームレート調整の待ち時間は含めない）
+        戻り値: 現在の段階
+        """
+        self._frame += 1
+        self._frame_secs.append(frame_sec)
+        if len(self._frame_secs) < self._frame_secs.maxlen or self._frame - self._last_change < self.cooldown:
+            return self.level
+        average = self.average()
+        if average > self.budget_sec * self.degrade_ratio and self.level < len(self.STEPS):
+            self._change(self.level + 1, average)
+        elif average < self.budget_sec * self.restore_ratio and self.level > 0:
+            self._change(self.level - 1, average)
+        return self.level
+
+    def _change(self, level: int, average: float) -> None:
+        previous = self.level
+        self.level = level
+        self._last_change = self._frame
+        # 変えた後の処理時間で判断するため、それまでの記録は捨てる
+        self._frame_secs.clear()
+        self.transitions.append((self._frame, previous, level, average))
+        if self.log is not None:
+            changed = self.STEPS[level - 1] if level > previous else self.STEPS[previous - 1]
+            action = "degrade" if level > previous else "restore"
+            self.log(f"Governor: frame {self._frame} {action} {changed!r} (level {previous} -> {level}, "
+                     f"avg {average * 1000:.1f} ms / budget {self.budget_sec * 1000:.1f} ms)")
+        if self.on_change is not None:
+            self.on_change(previous, level)
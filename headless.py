@@ -0,0 +1,107 @@
+"""
+ウィンドウ・音声デバイス無しでゲームを実行するモジュール（CIでの性能計測用）
+使い方: python headless.py --frames 600 --seed 0
+"""
+import os
+
+# pygameを初期化する前にダミーのドライバを指定する
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import argparse
+import json
+from typing import Callable, Iterable
+
+import pygame as pg
+
+import survive
+from assets import Assets
+from inputs import ScriptedInput, wander_script
+from profiler import Profiler
+from replay import InputRecorder, ReplayInput
+from sounds import SoundBank
+
+
+def create_game(seed: int = 0,
+                max_frames: int | None = None,
+                script: Callable[[int], tuple[Iterable[int], tuple[int, int]]] | None = None,
+                dtime: float | None = 1 / 60,
+                profile: bool = True,
+                tick_rate: float | None = 60,
+                render: bool = True,
+                dirty_rects: bool = False,
+                atlas: bool = True,
+                record: str | None = None,
+                replay: str | None = None,
+                **game_options) -> survive.Game:
+    """
+    ヘッドレスで動かすゲームを生成する関数
+    引数1: 乱数のシード
+    引数2: このフレーム数で終了する（Noneで無制限）
+    引数3: フレーム番号から入力を決める関数（Noneなら一定間隔で歩き回る）
+    引数4: 1フレームの経過時間（Noneなら実際の経過時間）
+    引数5: 処理ごとの時間を計測するかどうか
+    引数6: 1秒あたりのシミュレーションステップ数
+    引数7: Falseなら描画せずにシミュレーションだけを行う
+    引数8: Trueなら画面のうち変わった範囲だけをディスプレイに転送する
+    引数9: Trueならbake_atlas.pyで書き出したアトラスがあれば読み込む
+    引数10: 入力・経過時間・乱数のシードをこのファイルに記録する（任意）
+    引数11: このファイルに記録した入力で再生する（シード・入力・経過時間は記録に従う）
+    残りの引数: Gameに渡す引数（wavesなど）
+    """
+    survive.init_pygame()
+    screen = pg.display.set_mode((survive.WIDTH, survive.HEIGHT))
+    if atlas:
+        Assets.load_atlas()
+    SoundBank.load()
+    if replay is not None:
+        input_source = ReplayInput(replay)
+        seed = input_source.seed
+    else:
+        if script is None:
+            script = wander_script(screen.get_size())
+        input_source = ScriptedInput(script, max_frames)
+        if record is not None:
+            input_source = InputRecorder(input_source, record, seed)
+    return survive.Game(screen,
+                        input_source=input_source,
+                        seed=seed,
+                        profiler=Profiler(capacity=max_frames or 3600, enabled=profile),
+                        fixed_dtime=dtime,
+                        realtime=False,
+                        tick_rate=tick_rate,
+                        render=render,
+                        dirty_rects=dirty_rects,
+                        **game_options)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the game without a window and print frame-time statistics as JSON.")
+    parser.add_argument("--frames", type=int, default=600, help="number of frames to run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--dtime", type=float, default=1 / 60, help="simulated seconds per frame (0 for wall-clock time)")
+    parser.add_argument("--tick-rate", type=float, default=60, help="simulation steps per second")
+    parser.add_argument("--no-render", action="store_true", help="run simulation steps only, without drawing")
+    parser.add_argument("--dirty-rects", action="store_true", help="present only the changed screen regions")
+    parser.add_argument("--no-atlas", action="store_true", help="decode images from ./fig even if a baked atlas exists")
+    parser.add_argument("--record", help="record input, frame times and the seed to this file")
+    parser.add_argument("--replay", help="play back a recording instead of the scripted input (ignores --seed, --frames and --dtime)")
+    parser.add_argument("--governor", action="store_true", help="let the frame-budget governor shed load when frames exceed 16.7 ms (not with --record/--replay)")
+    parser.add_argument("--trace", help="write a Chrome trace-event JSON file to this path")
+    args = parser.parse_args()
+
+    game = create_game(args.seed, args.frames, dtime=args.dtime or None,
+                       tick_rate=args.tick_rate, render=not args.no_render,
+                       dirty_rects=args.dirty_rects, atlas=not args.no_atlas,
+                       record=args.record, replay=args.replay, governor=args.governor)
+    game.run()
+    if isinstance(game.input, InputRecorder):
+        game.input.close()
+    if args.trace:
+        game.profiler.export_chrome_trace(args.trace)
+    print(json.dumps(game.profiler.summary(), indent=2))
+    pg.quit()
+
+
+if __name__ == "__main__":
+    main()
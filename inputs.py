@@ -0,0 +1,94 @@
+"""
+キーボード・マウス入力の取得元をまとめたモジュール
+"""
+from typing import Callable, Iterable, Sequence
+
+import pygame as pg
+
+
+class KeyState:
+    """
+    pg.key.get_pressed()の戻り値の代わりに使う、押されているキーの集合
+    """
+
+    def __init__(self, pressed: Iterable[int] = ()) -> None:
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.pressed
+
+
+class LiveInput:
+    """
+    実際のキーボード・マウスから入力を取得するクラス
+    """
+
+    def poll(self) -> tuple[list[pg.event.Event], Sequence[bool], tuple[int, int]]:
+        """
+        1フレーム分の入力を取得する関数
+        戻り値: (イベントのリスト, 押下キーの真理値リスト, マウス座標)
+        """
+        events = pg.event.get()
+        return events, pg.key.get_pressed(), pg.mouse.get_pos()
+
+    def frame_time(self, dtime: float) -> float:
+        """
+        フレームの経過時間を受け取り、ゲームで使う経過時間を返す関数
+        """
+        return dtime
+
+
+class ScriptedInput:
+    """
+    フレーム番号から入力を決める関数に従って入力を返すクラス（ヘッドレス実行用）
+    """
+
+    def __init__(self,
+                 script: Callable[[int], tuple[Iterable[int], tuple[int, int]]],
+                 max_frames: int | None = None) -> None:
+        """
+        引数1: フレーム番号を受け取り、(押されているキー, マウス座標)を返す関数
+        引数2: このフレーム数に達したらQUITイベントを発生させる（Noneで無制限）
+        """
+        self.script = script
+        self.max_frames = max_frames
+        self.frame = 0
+
+    def poll(self) -> tuple[list[pg.event.Event], KeyState, tuple[int, int]]:
+        """
+        1フレーム分の入力を取得する関数
+        戻り値: (イベントのリスト, 押下キーの状態, マウス座標)
+        """
+        # ウィンドウのイベントキューは溜まらないように捨てる
+        pg.event.pump()
+        events: list[pg.event.Event] = []
+        if self.max_frames is not None and self.frame >= self.max_frames:
+            events.append(pg.event.Event(pg.QUIT))
+        keys, mouse_pos = self.script(self.frame)
+        self.frame += 1
+        return events, KeyState(keys), mouse_pos
+
+    def frame_time(self, dtime: float) -> float:
+        """
+        フレームの経過時間を受け取り、ゲームで使う経過時間を返す関数
+        """
+        return dtime
+
+
+def wander_script(screen_size: tuple[int, int], period_frames: int = 60) -> Callable[[int], tuple[list[int], tuple[int, int]]]:
+    """
+    一定フレームごとに移動方向を変え、マウスを画面中心の周りで回す入力を返す関数
+    引数1: 画面サイズ
+    引数2: 移動方向を変える間隔（フレーム数）
+    """
+    directions = [[pg.K_d], [pg.K_d, pg.K_s], [pg.K_s], [pg.K_a, pg.K_s],
+                  [pg.K_a], [pg.K_a, pg.K_w], [pg.K_w], [pg.K_d, pg.K_w]]
+    width, height = screen_size
+
+    def script(frame: int) -> tuple[list[int], tuple[int, int]]:
+        keys = directions[(frame // period_frames) % len(directions)]
+        step = frame % 360
+        mouse_x = width // 2 + [300, 0, -300, 0][step // 90]
+        mouse_y = height // 2 + [0, 300, 0, -300][step // 90]
+        return keys, (mouse_x, mouse_y)
+    return script
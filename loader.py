@@ -0,0 +1,185 @@
+"""
+画像をワーカースレッドでデコード（効果音はファイルの読み込みだけ）し、メインスレッドで描画用の形式に変換して登録する読み込みのモジュール
+"""
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+import pygame as pg
+from pygame.surface import Surface
+
+from assets import Assets
+from sounds import SoundBank
+from text import Text
+
+
+class AssetLoader:
+    """
+    ファイルのデコードをスレッドプールで行い、終わったものをpumpでAssets・SoundBankに登録するクラス
+    required=Trueのものが全て登録されればゲームを始められる（残りはゲーム中にpumpで少しずつ登録する）
+    """
+
+    def __init__(self, workers: int = 4) -> None:
+        """
+        引数1: デコードを行うスレッド数
+        """
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="asset-loader")
+        # デコードが終わったもの (種類, キー, 結果, 必須かどうか)。スレッドから入れてメインスレッドで取り出す
+        self._finished: queue.SimpleQueue[tuple[str, Any, Any, bool]] = queue.SimpleQueue()
+        # 登録が済んだ後にメインスレッドで実行する処理 (関数, 必須かどうか)
+        self._steps: list[tuple[Callable[[], Any], bool]] = []
+        self._pending = 0
+        self._pending_required = 0
+        self.total = 0
+        self.completed = 0
+        # デコードに失敗したファイル（使う時にAssets・SoundBankが読み込み直す）
+        self.errors: list[tuple[str, BaseException]] = []
+
+    def image(self, path: str, alpha: bool = True, required: bool = False) -> None:
+        """
+        画像ファイルのデコードを予約する関数（Assets.image(path, alpha)で使えるようになる）
+        アトラスに入っている・既に読み込んだ画像は何もしない
+        """
+        if Assets.has(("image", path, alpha)):
+            return
+        self._submit("image", (path, alpha), pg.image.load, path, required)
+
+    def sound(self, name: str, required: bool = False) -> None:
+        """
+        効果音のファイルの読み込みを予約する関数（SoundBank.SOUNDSの名前）
+        デコードには音声の出力の初期化が必要なので、メインスレッドでSoundBank.decodeが行う（thenで予約するか最初の再生時）
+        """
+        self._submit("sound", name, _read_file, SoundBank.SOUNDS[name][0], required)
+
+    def then(self, callback: Callable[[], Any], required: bool = False) -> None:
+        """
+        予約したデコードが終わった後にメインスレッドで実行する処理を追加する関数（追加した順に実行する）
+        引数2: Trueなら必須のものが登録された後、Falseなら全て登録された後に実行する
+        """
+        self._steps.append((callback, required))
+        self.total += 1
+
+    def _submit(self, kind: str, key: Any, decode: Callable[[str], Any], path: str, required: bool) -> None:
+        self.total += 1
+        self._pending += 1
+        if required:
+            self._pending_required += 1
+        future = self._executor.submit(decode, path)
+
+        def finished(future: Future) -> None:
+            if future.cancelled():
+                return
+            error = future.exception()
+            self._finished.put((kind, key, error if error is not None else future.result(), required))
+        future.add_done_callback(finished)
+
+    @property
+    def required_ready(self) -> bool:
+        return self._pending_required == 0 and not any(required for _, required in self._steps)
+
+    @property
+    def done(self) -> bool:
+        return self.completed == self.total
+
+    def progress(self) -> float:
+        return self.completed / self.total if self.total else 1.0
+
+    def pump(self, time_budget: float | None = None, timeout: float = 0.0) -> int:
+        """
+        デコードが終わったものを変換して登録し、実行できるようになった処理を実行する関数（メインスレッドで呼ぶ）
+        引数1: 使って良い時間[秒]（Noneなら終わっているものを全て登録する。最低1つは処理する）
+        引数2: 処理できるものが無ければ、デコードが終わるまでこの秒数だけ待つ
+        戻り値: 処理した数
+        """
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        processed = 0
+        while deadline is None or processed == 0 or time.perf_counter() < deadline:
+            try:
+                if processed == 0 and timeout > 0 and not self._can_run_step():
+                    kind, key, result, required = self._finished.get(timeout=timeout)
+                else:
+                    kind, key, result, required = self._finished.get_nowait()
+            except queue.Empty:
+                if not self._run_step():
+                    break
+            else:
+                self._register(kind, key, result)
+                self._pending -= 1
+                if required:
+                    self._pending_required -= 1
+            self.completed += 1
+            processed += 1
+        return processed
+
+    def _register(self, kind: str, key: Any, result: Any) -> None:
+        if isinstance(result, BaseException):
+            self.errors.append((key[0] if kind == "image" else key, result))
+            return
+        if kind == "image":
+            path, alpha = key
+            # 描画用のピクセル形式への変換はウィンドウのあるメインスレッドで行う
+            surface: Surface = result
+            if pg.display.get_surface() is not None:
+                surface = surface.convert_alpha() if alpha else surface.convert()
+            Assets.add(("image", path, alpha), surface)
+        else:
+            SoundBank.add_data(key, result)
+
+    def _can_run_step(self) -> bool:
+        # 先頭の処理が実行できる状態かどうか
+        if not self._steps:
+            return False
+        required = self._steps[0][1]
+        return (self._pending_required if required else self._pending) == 0
+
+    def _run_step(self) -> bool:
+        if not self._can_run_step():
+            return False
+        callback, _ = self._steps.pop(0)
+        callback()
+        return True
+
+    def wait_required(self, screen: Surface) -> bool:
+        """
+        必須のものが全て登録されるまで読み込み画面を表示しながら待つ関数
+        引数1: 描画先のSurface
+        戻り値: 待ち終えたらTrue、途中でウィンドウが閉じられたらFalse
+        """
+        while not self.required_ready:
+            for event in pg.event.get():
+                if event.type == pg.QUIT:
+                    return False
+            draw_loading_screen(screen, self.progress())
+            pg.display.update()
+            # 画面を描き直すまでの間は、デコードが終わり次第登録する
+            deadline = time.perf_counter() + 1 / 30
+            while not self.required_ready and time.perf_counter() < deadline:
+                self.pump(0, timeout=max(deadline - time.perf_counter(), 0.001))
+        return True
+
+    def shutdown(self) -> None:
+        """
+        スレッドプールを終了する関数（まだ始まっていないデコードは取り消す）
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def draw_loading_screen(screen: Surface, progress: float) -> None:
+    """
+    読み込み中の画面を描画する関数
+    引数1: 描画先のSurface
+    引数2: 進み具合（0.0～1.0）
+    """
+    width, height = screen.get_size()
+    screen.fill((0, 0, 0))
+    Text.draw(screen, f"Loading... {int(progress * 100)}%", 64, (255, 255, 255), center=(width // 2, height // 2 - 50))
+    bar = pg.Rect(0, 0, width // 2, 20)
+    bar.center = (width // 2, height // 2 + 20)
+    pg.draw.rect(screen, (255, 255, 255), bar, 2)
+    pg.draw.rect(screen, (255, 255, 0), pg.Rect(bar.left, bar.top, int(bar.width * progress), bar.height))
@@ -0,0 +1,58 @@
+"""
+カメラから遠い敵ほど少ない頻度でシミュレーションするための詳細度（LOD）のモジュール（NumPyが必要）
+"""
+from pygame.rect import Rect
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SimulationLOD:
+    """
+    基準の範囲（カメラに映る範囲に余白を足したもの）からの距離で敵を段階（tier）に分け、段階ごとの間隔でだけ更新させるクラス
+    """
+
+    # 各段階の外側の境界（基準の範囲の端からの距離[px]）。最後の境界より外は最後の段階
+    RINGS = (0, 900)
+    # 各段階を何ステップに1回更新するか（RINGSより1つ多い）
+    INTERVALS = (1, 2, 4)
+
+    def __init__(self, rings: tuple[int, ...] = RINGS, intervals: tuple[int, ...] = INTERVALS) -> None:
+        """
+        引数1: 各段階の外側の境界[px]
+        引数2: 各段階の更新間隔[ステップ]
+        """
+        if np is None:
+            raise RuntimeError("SimulationLOD requires numpy")
+        self.rings = np.array(rings, dtype=float)
+        self.set_intervals(intervals)
+        self._step = 0
+        # 直前のplanでの各段階の数
+        self.counts = [0] * len(intervals)
+
+    def set_intervals(self, intervals: tuple[int, ...]) -> None:
+        """
+        各段階の更新間隔を変える関数（段階の数は変えられない）
+        """
+        if len(intervals) != len(self.rings) + 1:
+            raise ValueError("intervals must have one more entry than rings")
+        self.intervals = np.array(intervals, dtype=np.intp)
+
+    def plan(self, pos: "np.ndarray", view_rect: Rect) -> tuple["np.ndarray", "np.ndarray"]:
+        """
+        各位置の段階と、このステップで更新するかどうかを求める関数（1ステップに1回呼ぶ）
+        引数1: 位置の配列 (n, 2)
+        引数2: 基準の範囲
+        戻り値: (段階の配列, 更新するかどうかの配列)
+        """
+        x, y = pos[:, 0], pos[:, 1]
+        dx = np.maximum(np.maximum(view_rect.left - x, x - view_rect.right), 0.0)
+        dy = np.maximum(np.maximum(view_rect.top - y, y - view_rect.bottom), 0.0)
+        tiers = np.searchsorted(self.rings, np.maximum(dx, dy))
+        # 同じ段階の敵が同じステップに集中しないように、番号でずらす
+        due = (np.arange(len(pos)) + self._step) % self.intervals[tiers] == 0
+        self._step += 1
+        self.counts = np.bincount(tiers, minlength=len(self.intervals)).tolist()
+        return tiers, due
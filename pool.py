@@ -0,0 +1,138 @@
+"""
+使い終わったSpriteを捨てずに再利用するためのオブジェクトプールのモジュール
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class ObjectPool:
+    """
+    killされたオブジェクトを保持しておき、次の生成時に再利用するクラス
+    """
+
+    # 生成した全てのプール（clear_allで空にする）
+    pools: list["ObjectPool"] = []
+
+    def __init__(self, name: str) -> None:
+        """
+        引数1: 統計表示用の名前
+        """
+        self.name = name
+        self._free: list[Any] = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        ObjectPool.pools.append(self)
+
+    @classmethod
+    def clear_all(cls) -> None:
+        """
+        全てのプールを空にし、統計も0に戻す関数（ゲームを始める時に呼び、前のゲームのオブジェクトを持ち越さない）
+        """
+        for pool in cls.pools:
+            pool.clear()
+
+    def clear(self) -> None:
+        """
+        プール内のオブジェクトを捨て、統計を0に戻す関数
+        """
+        self._free.clear()
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    @staticmethod
+    def is_free(obj: Any) -> bool:
+        """
+        オブジェクトがプールに戻されている（使われていない）かどうかを返す関数
+        """
+        return getattr(obj, "_pooled", False)
+
+    def acquire(self) -> Any | None:
+        """
+        再利用できるオブジェクトを取り出す関数
+        戻り値: オブジェクト（無ければNone）
+        """
+        if not self._free:
+            return None
+        obj = self._free.pop()
+        obj._pooled = False
+        self.reused += 1
+        return obj
+
+    def register(self, obj: Any) -> None:
+        """
+        新しく生成したオブジェクトを使用中として数える関数
+        """
+        obj._pooled = False
+        self.created += 1
+
+    def release(self, obj: Any) -> bool:
+        """
+        使い終わったオブジェクトをプールに戻す関数
+        戻り値: 戻したならTrue（既に戻っていればFalse）
+        """
+        if self.is_free(obj):
+            return False
+        obj._pooled = True
+        self._free.append(obj)
+        self.released += 1
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """
+        生成数・再利用数・プール内の数・使用中の数を返す関数
+        """
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "free": len(self._free),
+            "in_use": self.created - len(self._free),
+        }
+
+
+class Pooled(ABC):
+    """
+    createで生成するとプールのオブジェクトを再利用するクラスの基底クラス
+    派生クラスはクラス変数poolと、__init__と同じ引数で状態を初期化し直すresetを持ち、killでpoolに戻ること
+    """
+
+    pool: ObjectPool
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        """
+        プールにあれば再利用し、無ければ新しく生成する関数（引数は__init__と同じ）
+        """
+        obj = cls.pool.acquire()
+        if obj is None:
+            obj = cls(*args, **kwargs)
+            cls.pool.register(obj)
+            return obj
+        obj.reset(*args, **kwargs)
+        return obj
+
+    @classmethod
+    def prewarm(cls, count: int, *args, **kwargs) -> int:
+        """
+        プール内のオブジェクトがcount個になるまで生成してプールに戻しておく関数
+        引数1: 目標の数
+        残りの引数: __init__に渡す引数
+        戻り値: 生成した数
+        """
+        made = 0
+        while len(cls.pool) < count:
+            obj = cls(*args, **kwargs)
+            cls.pool.register(obj)
+            obj.kill()
+            made += 1
+        return made
+
+    @abstractmethod
+    def reset(self, *args, **kwargs) -> None:
+        """
+        __init__と同じ引数で状態を初期化し直す関数（createでプールから再利用する時に呼ばれる）
+        """
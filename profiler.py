@@ -0,0 +1,184 @@
+"""
+フレーム内の処理ごとの時間を計測するモジュール
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Iterator
+
+import pygame as pg
+from pygame.surface import Surface
+
+from text import Text
+
+
+class FrameRecord:
+    """
+    1フレーム分の計測結果
+    """
+    __slots__ = ("start", "total", "phases", "events", "counters")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.total = 0.0
+        # 処理名: 合計秒
+        self.phases: dict[str, float] = {}
+        # (処理名, 開始時刻, 秒) Chromeのトレース出力用
+        self.events: list[tuple[str, float, float]] = []
+        # 敵の数などの値
+        self.counters: dict[str, int] = {}
+
+
+class Profiler:
+    """
+    1フレームの中の各処理（スポーン・敵の更新・描画など）にかかった時間を直近capacityフレーム分記録するクラス
+    """
+
+    # オーバーレイでの処理ごとの色
+    COLORS = [(230, 25, 75), (60, 180, 75), (255, 225, 25), (0, 130, 200), (245, 130, 48),
+              (145, 30, 180), (70, 240, 240), (240, 50, 230), (210, 245, 60), (250, 190, 212)]
+    # オーバーレイのグラフで1px当たりのミリ秒
+    GRAPH_MS_PER_PX = 0.25
+
+    def __init__(self, capacity: int = 300, enabled: bool = True) -> None:
+        """
+        引数1: 記録しておくフレーム数（古いものから捨てる）
+        引数2: 計測するかどうか（Falseならscopeは何もしない）
+        """
+        self.enabled = enabled
+        self.frames: deque[FrameRecord] = deque(maxlen=capacity)
+        self._current: FrameRecord | None = None
+        self._origin = time.perf_counter()
+        # 一度でも計測した処理名（オーバーレイの色を固定するため順番を保つ）
+        self._phase_names: list[str] = []
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._current = FrameRecord(time.perf_counter())
+
+    def end_frame(self) -> None:
+        frame = self._current
+        if frame is None:
+            return
+        frame.total = time.perf_counter() - frame.start
+        self.frames.append(frame)
+        self._current = None
+
+    def count(self, name: str, value: int) -> None:
+        """
+        現在のフレームの値（敵の数など）を記録する関数
+        引数1: 値の名前
+        引数2: 値
+        """
+        if self._current is not None:
+            self._current.counters[name] = value
+
+    def scope(self, name: str):
+        """
+        with文で囲んだ処理の時間をnameとして記録する関数
+        引数1: 処理名
+        """
+        if self._current is None:
+            return nullcontext()
+        return self._scope(name)
+
+    @contextmanager
+    def _scope(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            sec = time.perf_counter() - start
+            frame = self._current
+            if frame is not None:
+                frame.phases[name] = frame.phases.get(name, 0.0) + sec
+                frame.events.append((name, start, sec))
+                if name not in self._phase_names:
+                    self._phase_names.append(name)
+
+    def summary(self) -> dict:
+        """
+        記録したフレームの統計をミリ秒単位で返す関数
+        戻り値: フレーム数・平均・p95・p99・最大のフレーム時間と、処理ごとの平均時間の辞書
+        """
+        totals = sorted(frame.total for frame in self.frames)
+        if not totals:
+            return {"frames": 0}
+
+        def percentile(p: float) -> float:
+            return totals[min(len(totals) - 1, int(len(totals) * p))] * 1000
+
+        phases: dict[str, float] = {}
+        for frame in self.frames:
+            for name, sec in frame.phases.items():
+                phases[name] = phases.get(name, 0.0) + sec
+        return {
+            "frames": len(totals),
+            "mean_ms": sum(totals) / len(totals) * 1000,
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": totals[-1] * 1000,
+            "phases_ms": {name: sec / len(totals) * 1000 for name, sec in phases.items()},
+        }
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        記録したフレームをChromeのトレースイベント形式（chrome://tracing, Perfettoで開ける）で書き出す関数
+        引数1: 出力先のファイルパス
+        """
+        def us(sec: float) -> float:
+            return (sec - self._origin) * 1_000_000
+
+        events = []
+        for frame in self.frames:
+            events.append({"name": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": us(frame.start), "dur": frame.total * 1_000_000})
+            for name, start, sec in frame.events:
+                events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                               "ts": us(start), "dur": sec * 1_000_000})
+            if frame.counters:
+                events.append({"name": "entities", "ph": "C", "pid": 0, "tid": 0,
+                               "ts": us(frame.start), "args": dict(frame.counters)})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def draw(self, screen: Surface, topleft: tuple[int, int] = (10, 40), height: int = 160) -> None:
+        """
+        直近のフレーム時間を処理ごとに積み上げたグラフと、値の一覧を描画する関数
+        引数1: 描画先のSurface
+        引数2: グラフの左上の位置
+        引数3: グラフの高さ
+        """
+        left, top = topleft
+        width = self.frames.maxlen or len(self.frames)
+        panel = pg.Surface((width, height))
+        panel.set_alpha(180)
+        screen.blit(panel, topleft)
+        bottom = top + height
+        colors = {name: self.COLORS[i % len(self.COLORS)] for i, name in enumerate(self._phase_names)}
+        for x, frame in enumerate(self.frames):
+            y = bottom
+            for name, sec in frame.phases.items():
+                bar = sec * 1000 / self.GRAPH_MS_PER_PX
+                if bar >= 1:
+                    pg.draw.line(screen, colors[name], (left + x, y), (left + x, max(y - bar, top)))
+                y -= bar
+        # 60FPSで1フレームに使える時間の線
+        budget_y = bottom - (1000 / 60) / self.GRAPH_MS_PER_PX
+        if budget_y >= top:
+            pg.draw.line(screen, (255, 255, 255), (left, budget_y), (left + width, budget_y))
+
+        if not self.frames:
+            return
+        last = self.frames[-1]
+        y = bottom + 4
+        Text.draw(screen, f"frame {last.total * 1000:5.2f} ms", 24, (255, 255, 255), topleft=(left, y))
+        y += 20
+        for name in self._phase_names:
+            Text.draw(screen, f"{name} {last.phases.get(name, 0.0) * 1000:5.2f} ms", 24, colors[name], topleft=(left, y))
+            y += 20
+        for name, value in last.counters.items():
+            Text.draw(screen, f"{name} {value}", 24, (255, 255, 255), topleft=(left, y))
+            y += 20
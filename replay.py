@@ -0,0 +1,141 @@
+"""
+入力を記録・再生するモジュール（フレームレートの低下などを同じ入力で再現して計測するため）
+
+記録ファイルの形式（リトルエンディアン）
+    ヘッダ: マジック(8バイト), 乱数のシード(u64)
+    フレーム: 押されている移動キーのビット(u8), マウス座標(i16, i16), イベント数(u8), 経過時間[秒](f64)
+              続けてイベント数だけ 種類(u8: 0=QUIT, 1=KEYDOWN), キー(u32)
+"""
+import struct
+from typing import BinaryIO, Sequence
+
+import pygame as pg
+
+from inputs import KeyState, LiveInput, ScriptedInput
+
+MAGIC = b"SRVRPLY1"
+HEADER = struct.Struct("<8sQ")
+FRAME = struct.Struct("<BhhBd")
+EVENT = struct.Struct("<BI")
+
+# 記録するキー（Playerの移動に使うキー）。押されているかどうかをこの順のビットで保存する
+RECORDED_KEYS = (pg.K_w, pg.K_a, pg.K_s, pg.K_d)
+
+_QUIT = 0
+_KEYDOWN = 1
+
+
+class InputRecorder:
+    """
+    別の入力の取得元から取得した入力と各フレームの経過時間をファイルに記録するクラス
+    """
+
+    def __init__(self, source: LiveInput | ScriptedInput, path: str, seed: int) -> None:
+        """
+        引数1: 実際に入力を取得する取得元
+        引数2: 記録ファイルのパス
+        引数3: ゲームに渡す乱数のシード
+        """
+        self.source = source
+        self.seed = seed
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, seed))
+        # 経過時間が決まるまで書き出さずに持っておく (移動キー, マウス座標, イベント)
+        self._pending: tuple[int, tuple[int, int], list[tuple[int, int]]] | None = None
+        self.frames = 0
+
+    def poll(self) -> tuple[list[pg.event.Event], Sequence[bool], tuple[int, int]]:
+        """
+        1フレーム分の入力を取得して記録する関数
+        戻り値: (イベントのリスト, 押下キーの状態, マウス座標)
+        """
+        events, keys, mouse_pos = self.source.poll()
+        bits = 0
+        for i, key in enumerate(RECORDED_KEYS):
+            if keys[key]:
+                bits |= 1 << i
+        recorded = [(_QUIT, 0) if event.type == pg.QUIT else (_KEYDOWN, event.key)
+                    for event in events if event.type in (pg.QUIT, pg.KEYDOWN)]
+        self._pending = (bits, mouse_pos, recorded)
+        return events, keys, mouse_pos
+
+    def frame_time(self, dtime: float) -> float:
+        """
+        フレームの経過時間を記録する関数
+        引数1: 経過時間
+        戻り値: ゲームで使う経過時間（引数と同じ）
+        """
+        self._write(dtime)
+        return dtime
+
+    def _write(self, dtime: float) -> None:
+        if self._pending is None:
+            return
+        bits, (mouse_x, mouse_y), events = self._pending
+        self._file.write(FRAME.pack(bits, mouse_x, mouse_y, len(events), dtime))
+        for event_type, key in events:
+            self._file.write(EVENT.pack(event_type, key))
+        self._pending = None
+        self.frames += 1
+
+    def close(self) -> None:
+        """
+        記録を終える関数（最後のフレームは経過時間0として書き出す）
+        """
+        if self._file.closed:
+            return
+        self._write(0.0)
+        self._file.close()
+
+
+class ReplayInput:
+    """
+    InputRecorderで記録したファイルから入力と経過時間を再生するクラス
+    記録の最後まで再生したらQUITイベントを発生させる
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        引数1: 記録ファイルのパス
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, self.seed = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an input recording")
+        # (押されているキー, マウス座標, イベント, 経過時間)
+        self.records: list[tuple[KeyState, tuple[int, int], list[pg.event.Event], float]] = []
+        offset = HEADER.size
+        while offset < len(data):
+            bits, mouse_x, mouse_y, event_count, dtime = FRAME.unpack_from(data, offset)
+            offset += FRAME.size
+            events = []
+            for _ in range(event_count):
+                event_type, key = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                events.append(pg.event.Event(pg.QUIT) if event_type == _QUIT else pg.event.Event(pg.KEYDOWN, key=key))
+            keys = KeyState(key for i, key in enumerate(RECORDED_KEYS) if bits & (1 << i))
+            self.records.append((keys, (mouse_x, mouse_y), events, dtime))
+        self.frame = 0
+
+    def poll(self) -> tuple[list[pg.event.Event], KeyState, tuple[int, int]]:
+        """
+        1フレーム分の入力を取得する関数
+        戻り値: (イベントのリスト, 押下キーの状態, マウス座標)
+        """
+        # ウィンドウのイベントキューは溜まらないように捨てる
+        pg.event.pump()
+        if self.frame >= len(self.records):
+            return [pg.event.Event(pg.QUIT)], KeyState(), (0, 0)
+        keys, mouse_pos, events, _ = self.records[self.frame]
+        return list(events), keys, mouse_pos
+
+    def frame_time(self, dtime: float) -> float:
+        """
+        記録したフレームの経過時間を返し、次のフレームに進む関数
+        引数1: 実際の経過時間（使わない）
+        戻り値: 記録した経過時間
+        """
+        record_dtime = self.records[self.frame][3] if self.frame < len(self.records) else dtime
+        self.frame += 1
+        return record_dtime
@@ -0,0 +1,168 @@
+"""
+時刻を指定した処理（敵のスポーン・無敵時間の終了など）をまとめて管理するスケジューラのモジュール
+毎フレーム全てのタイマーを減らす代わりに、実行時刻の早い順に並べたヒープから時刻になったものだけを取り出す
+"""
+import heapq
+import json
+from typing import Any, Callable
+
+
+class Timer:
+    """
+    Scheduler.call_later・everyの戻り値。cancelで実行を取り消せる
+    """
+    __slots__ = ("time", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, time: float, interval: float | None, callback: Callable[..., Any], args: tuple) -> None:
+        self.time = time
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """
+        まだ実行されていなければ取り消す関数（実行済み・取り消し済みなら何もしない）
+        """
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    シミュレーション時刻で処理を予約し、advanceで時刻を進めた時に実行するクラス
+    """
+
+    # ゲーム中のスケジューラ（Camera.active_cameraと同じく、各キャラから予約するために使う）
+    active_scheduler: "Scheduler" = None
+
+    def __init__(self, is_active_now: bool = True) -> None:
+        """
+        引数1: 生成時にactive_schedulerにするかどうか
+        """
+        self.now = 0.0
+        # (実行時刻, 予約順, Timer) 同じ時刻なら予約順に実行する
+        self._heap: list[tuple[float, int, Timer]] = []
+        self._sequence = 0
+        # 直前のadvanceで実行した数
+        self.fired_count = 0
+        if is_active_now:
+            Scheduler.active_scheduler = self
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> Timer:
+        """
+        delay秒後にcallback(*args)を実行するように予約する関数
+        戻り値: 取り消し用のTimer
+        """
+        return self._push(Timer(self.now + delay, None, callback, args))
+
+    def every(self, interval: float, callback: Callable[..., Any], *args: Any, delay: float | None = None) -> Timer:
+        """
+        interval秒ごとにcallback(*args)を実行するように予約する関数
+        引数1: 間隔[秒]
+        引数2: 実行する関数
+        残りの引数: callbackに渡す引数
+        delay: 初回を実行するまでの秒数（Noneならinterval）
+        戻り値: 取り消し用のTimer
+        """
+        return self._push(Timer(self.now + (interval if delay is None else delay), interval, callback, args))
+
+    def _push(self, timer: Timer) -> Timer:
+        heapq.heappush(self._heap, (timer.time, self._sequence, timer))
+        self._sequence += 1
+        return timer
+
+    def advance(self, dtime: float) -> int:
+        """
+        時刻をdtime秒進め、その時刻までに予約された処理を時刻順に実行する関数
+        実行中に予約された処理も、進めた後の時刻までに来るものは同じ呼び出しの中で実行する
+        戻り値: 実行した数
+        """
+        self.now += dtime
+        heap = self._heap
+        fired = 0
+        while heap and heap[0][0] <= self.now:
+            _, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                # 処理落ちしても1回のadvanceで何度も実行しないように、次の時刻は今より後にする
+                timer.time = max(timer.time + timer.interval, self.now + 1e-9)
+                self._push(timer)
+            else:
+                timer.cancelled = True
+            timer.callback(*timer.args)
+            fired += 1
+        self.fired_count = fired
+        return fired
+
+
+class WaveScheduler:
+    """
+    データファイルで定義したウェーブに従って、敵のスポーンをSchedulerに予約するクラス
+
+    ウェーブの定義（JSON）
+        {"waves": [{"start": 開始[秒], "end": 終了[秒], "spawns": [スポーン規則, ...]}, ...]}
+    スポーン規則
+        {"kind": 敵の種類, "interval": 間隔[秒]（省略すると1回だけ）, "delay": 初回までの秒数（省略するとinterval、1回だけなら0）,
+         "count": 1回にスポーンさせる数（省略すると1）}
+    """
+
+    def __init__(self, scheduler: Scheduler, waves: list[dict[str, Any]], spawn: Callable[[str], Any]) -> None:
+        """
+        引数1: 予約先のスケジューラ
+        引数2: ウェーブの定義のリスト（開始時刻順）
+        引数3: 敵の種類を受け取ってスポーンさせる関数
+        """
+        self.scheduler = scheduler
+        self.waves = sorted(waves, key=lambda wave: wave["start"])
+        self.spawn = spawn
+        # 現在のウェーブの番号（-1ならどのウェーブも始まっていない）
+        self.index = -1
+        self._timers: list[Timer] = []
+        self.spawned_count = 0
+
+    @staticmethod
+    def load(path: str) -> list[dict[str, Any]]:
+        """
+        ウェーブの定義をファイルから読み込む関数
+        """
+        with open(path) as f:
+            return json.load(f)["waves"]
+
+    def update(self, time: float) -> None:
+        """
+        経過時間timeに対応するウェーブに切り替える関数（毎ステップ呼ぶ。切り替わる時以外は比較1回で終わる）
+        引数1: 生き残っている時間[秒]
+        """
+        index = self.index
+        if index + 1 < len(self.waves) and time >= self.waves[index + 1]["start"]:
+            # 途中から始めた場合は飛ばしたウェーブのスポーンを行わない
+            while index + 1 < len(self.waves) and time >= self.waves[index + 1]["start"]:
+                index += 1
+            self._start(index)
+        elif index >= 0 and self._timers and time >= self.waves[index]["end"]:
+            self._stop()
+
+    def _start(self, index: int) -> None:
+        self._stop()
+        self.index = index
+        for rule in self.waves[index]["spawns"]:
+            interval = rule.get("interval")
+            args = (rule["kind"], rule.get("count", 1))
+            if interval is None:
+                self._timers.append(self.scheduler.call_later(rule.get("delay", 0), self._spawn, *args))
+            else:
+                self._timers.append(self.scheduler.every(interval, self._spawn, *args, delay=rule.get("delay")))
+
+    def _stop(self) -> None:
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+
+    def _spawn(self, kind: str, count: int) -> None:
+        for _ in range(count):
+            self.spawn(kind)
+        self.spawned_count += count
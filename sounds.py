@@ -0,0 +1,136 @@
+"""
+効果音を一度だけデコードし、予約したチャンネルで再生するモジュール
+"""
+import io
+
+import pygame as pg
+
+
+class SoundBank:
+    """
+    効果音の読み込みと再生チャンネルの割り当てを管理するクラス
+    """
+
+    # 効果音名: (ファイルパス, 同時再生数の上限, 優先度)
+    SOUNDS: dict[str, tuple[str, int, int]] = {
+        "bullet": ("./fig/se_bullet.mp3", 3, 0),
+        "enemy_damage": ("./fig/se_enemy_damage.mp3", 4, 1),
+        "enemy_death": ("./fig/se_enemy_death.mp3", 4, 2),
+        "powerup": ("./fig/se_powerup.mp3", 1, 3),
+    }
+    # 効果音用に予約するチャンネル数
+    CHANNEL_COUNT = 12
+    # 各効果音の同時再生数をこの数までに抑える（Noneなら抑えない。処理が重い時にFrameGovernorが設定する）
+    voice_limit: int | None = None
+
+    _sounds: dict[str, pg.mixer.Sound] = {}
+    # 別の場所で読み込んだまだデコードしていないファイルの中身
+    _data: dict[str, bytes] = {}
+    _channels: list[pg.mixer.Channel] = []
+    # チャンネル番号: (効果音名, 優先度, 再生開始順)
+    _voices: dict[int, tuple[str, int, int]] = {}
+    # 今フレームで再生要求された効果音と音量
+    _pending: dict[str, float] = {}
+    _play_count = 0
+
+    @classmethod
+    def load(cls) -> None:
+        """
+        まだデコードしていない効果音を全てデコードする関数
+        最初の効果音を再生する時にも呼ばれるので、音声を使わない起動・ツールでは音声の出力を開かない
+        """
+        if len(cls._sounds) == len(cls.SOUNDS):
+            return
+        for name in cls.SOUNDS:
+            cls.decode(name)
+
+    @classmethod
+    def decode(cls, name: str) -> None:
+        """
+        効果音を1つデコードする関数（音声の出力が未初期化なら初期化し、再生用のチャンネルを予約する）
+        読み込みの合間に1つずつ呼んでおくと、最初の再生時にまとめてデコードせずに済む
+        引数1: 効果音名
+        """
+        if name in cls._sounds:
+            return
+        cls._open()
+        data = cls._data.pop(name, None)
+        path = cls.SOUNDS[name][0]
+        cls._sounds[name] = pg.mixer.Sound(file=io.BytesIO(data)) if data is not None else pg.mixer.Sound(path)
+
+    @classmethod
+    def _open(cls) -> None:
+        # 音声の出力を初期化し、効果音用のチャンネルを予約する
+        if cls._channels:
+            return
+        if pg.mixer.get_init() is None:
+            pg.mixer.init()
+        if pg.mixer.get_num_channels() < cls.CHANNEL_COUNT:
+            pg.mixer.set_num_channels(cls.CHANNEL_COUNT)
+        pg.mixer.set_reserved(cls.CHANNEL_COUNT)
+        cls._channels = [pg.mixer.Channel(i) for i in range(cls.CHANNEL_COUNT)]
+
+    @classmethod
+    def add_data(cls, name: str, data: bytes) -> None:
+        """
+        別の場所で読み込んだ効果音のファイルの中身を登録する関数（decodeでファイルを読まずにデコードする）
+        """
+        if name not in cls._sounds:
+            cls._data[name] = data
+
+    @classmethod
+    def play(cls, name: str, volume: float = 1.0) -> None:
+        """
+        効果音の再生を要求する関数。同じフレームに要求された同じ効果音は一つにまとめ、最も大きい音量で再生する
+        引数1: 効果音名
+        引数2: 音量（0.0～1.0）
+        """
+        cls._pending[name] = max(volume, cls._pending.get(name, 0.0))
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        今フレームに要求された効果音をまとめて再生する関数（1フレームに1回呼ぶ）
+        """
+        if not cls._pending:
+            return
+        cls.load()
+        # 再生が終わったチャンネルを解放
+        for idx in [idx for idx in cls._voices if not cls._channels[idx].get_busy()]:
+            del cls._voices[idx]
+        # 優先度の高い効果音から割り当てる
+        for name, volume in sorted(cls._pending.items(), key=lambda item: -cls.SOUNDS[item[0]][2]):
+            if volume <= 0:
+                continue
+            idx = cls._find_channel(name)
+            if idx is None:
+                continue
+            channel = cls._channels[idx]
+            channel.set_volume(volume)
+            channel.play(cls._sounds[name])
+            cls._voices[idx] = (name, cls.SOUNDS[name][2], cls._play_count)
+            cls._play_count += 1
+        cls._pending.clear()
+
+    @classmethod
+    def _find_channel(cls, name: str) -> int | None:
+        """
+        効果音を再生するチャンネルを選ぶ関数
+        引数1: 効果音名
+        戻り値: チャンネル番号（再生しない場合はNone）
+        """
+        _, max_voices, priority = cls.SOUNDS[name]
+        if cls.voice_limit is not None:
+            max_voices = min(max_voices, cls.voice_limit)
+        # 同時再生数の上限に達していれば、同じ効果音の最も古いものを止めて使う
+        same = [idx for idx, voice in cls._voices.items() if voice[0] == name]
+        if len(same) >= max_voices:
+            return min(same, key=lambda idx: cls._voices[idx][2])
+        for idx in range(len(cls._channels)):
+            if idx not in cls._voices:
+                return idx
+        # 空きが無ければ優先度が低く古いものを止めて使う
+        idx = min(cls._voices, key=lambda idx: (cls._voices[idx][1], cls._voices[idx][2]))
+        if cls._voices[idx][1] > priority:
+            return None
+        return idx
@@ -0,0 +1,122 @@
+"""
+一様グリッドによる当たり判定の絞り込み（ブロードフェーズ）を行うモジュール
+"""
+from typing import Iterable
+
+import pygame as pg
+from pygame.rect import Rect
+from pygame.sprite import Sprite
+
+
+class SpatialHash:
+    """
+    ワールドを一辺cell_sizeのマスに区切り、各マスに重なるSpriteを登録しておくクラス
+    """
+
+    def __init__(self, cell_size: int = 256) -> None:
+        """
+        空のグリッドを生成する関数
+        引数1: マスの一辺の長さ
+        """
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[Sprite]] = {}
+
+    def clear(self) -> None:
+        self._cells = {}
+
+    def build(self, sprites: Iterable[Sprite]) -> None:
+        """
+        グリッドを作り直す関数（Spriteが移動した後、判定の前に1フレームに1回呼ぶ）
+        引数1: 登録するSprite達
+        """
+        cells: dict[tuple[int, int], list[Sprite]] = {}
+        size = self.cell_size
+        for sprite in sprites:
+            left, top, width, height = sprite.rect
+            x0, x1 = left // size, (left + width - 1) // size
+            y0, y1 = top // size, (top + height - 1) // size
+            if x0 == x1 and y0 == y1:
+                cell = cells.get((x0, y0))
+                if cell is None:
+                    cells[(x0, y0)] = [sprite]
+                else:
+                    cell.append(sprite)
+                continue
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [sprite]
+                    else:
+                        cell.append(sprite)
+        self._cells = cells
+
+    def query(self, rect: Rect) -> list[Sprite]:
+        """
+        rectと同じマスに登録されているSprite（当たっている可能性があるもの）を返す関数
+        引数1: 範囲
+        戻り値: 候補のSpriteのリスト（重複なし）
+        """
+        size = self.cell_size
+        x0, x1 = rect.left // size, (rect.right - 1) // size
+        y0, y1 = rect.top // size, (rect.bottom - 1) // size
+        cells = self._cells
+        if x0 == x1 and y0 == y1:
+            return list(cells.get((x0, y0), ()))
+        found: dict[Sprite, None] = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    found.update(dict.fromkeys(cell))
+        return list(found)
+
+    def collide(self, rect: Rect) -> list[Sprite]:
+        """
+        rectと重なっているSpriteを返す関数
+        引数1: 範囲
+        戻り値: 重なっているSpriteのリスト
+        """
+        colliderect = rect.colliderect
+        return [sprite for sprite in self.query(rect) if colliderect(sprite.rect)]
+
+
+def spritecollide(sprite: Sprite, group: pg.sprite.AbstractGroup, dokill: bool = False) -> list[Sprite]:
+    """
+    pg.sprite.spritecollideと同じ判定を、グループにグリッドがあればそれを使って行う関数
+    引数1: 判定するSprite
+    引数2: 相手のグループ（spatial_index属性にSpatialHashを持っていれば使う）
+    引数3: 当たった相手をkillするかどうか
+    戻り値: 当たった相手のリスト
+    """
+    index: SpatialHash | None = getattr(group, "spatial_index", None)
+    if index is None:
+        return pg.sprite.spritecollide(sprite, group, dokill)
+    # グリッド作成後にグループから外れたSpriteは除く
+    hits = [target for target in index.collide(sprite.rect) if target in group]
+    if dokill:
+        for target in hits:
+            target.kill()
+    return hits
+
+
+def groupcollide(groupa: pg.sprite.AbstractGroup,
+                 groupb: pg.sprite.AbstractGroup,
+                 dokilla: bool,
+                 dokillb: bool) -> dict[Sprite, list[Sprite]]:
+    """
+    pg.sprite.groupcollideと同じ判定を、groupbのグリッドを使って行う関数
+    引数1: グループA
+    引数2: グループB（spatial_index属性にSpatialHashを持っていれば使う）
+    引数3: 当たったAをkillするかどうか
+    引数4: 当たったBをkillするかどうか
+    戻り値: Aの各Spriteに当たったBのリストの辞書
+    """
+    crashed: dict[Sprite, list[Sprite]] = {}
+    for sprite in groupa.sprites():
+        hits = spritecollide(sprite, groupb, dokillb)
+        if hits:
+            crashed[sprite] = hits
+            if dokilla:
+                sprite.kill()
+    return crashed
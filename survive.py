@@ -1,15 +1,37 @@
+import argparse
+import json
 import math
+import os
 import random
 import sys
 import time
-from typing import List, Sequence, cast
+from typing import Any, Callable, Hashable, List, Sequence
+
+# 起動時間の計測の基準（pygameなどを読み込む前の時刻）
+STARTUP_TIME = time.perf_counter()
 
 import pygame as pg
 from pygame.rect import Rect
 from pygame.sprite import Sprite
 from pygame.surface import Surface
 
-pg.mixer.init()
+import ecs
+import spatial
+from assets import Assets
+from damage import DamageEvents
+from dirtyrects import DirtyRects
+from governor import FrameGovernor
+from inputs import KeyState, LiveInput, ScriptedInput
+from loader import AssetLoader
+from lod import SimulationLOD
+from pool import ObjectPool, Pooled
+from profiler import Profiler
+from replay import InputRecorder, ReplayInput
+from scheduler import Scheduler, Timer, WaveScheduler
+from sounds import SoundBank
+from spatial import SpatialHash
+from swarm import HAS_NUMPY, Swarm
+from text import Text
 
 WIDTH = 1600  # ゲームウィンドウの幅
 HEIGHT = 900  # ゲームウィンドウの高さ
@@ -32,6 +54,8 @@ class Camera():
         """
         self.screen = screen
         self.center_pos = [0, 0]
+        # 直前のシミュレーションステップ開始時の位置（描画時の補間用）
+        self.prev_center_pos = [0, 0]
         self.targetCharacter = targetCharacter
         if is_acrive_now:
             self.__class__.active_camera = self
@@ -45,6 +69,26 @@ class Camera():
         self.center_pos[0] = clamp(self.center_pos[0], -MoveArea.width / 2 + self.screen.get_width() / 2, MoveArea.width / 2 - self.screen.get_width() / 2)
         self.center_pos[1] = clamp(self.center_pos[1], -MoveArea.height / 2 + self.screen.get_height() / 2, MoveArea.height / 2 - self.screen.get_height() / 2)
 
+    def snapshot(self) -> None:
+        """
+        現在の位置を補間用に記録する関数（シミュレーションステップの前に呼ぶ）
+        """
+        self.prev_center_pos = list(self.center_pos)
+
+    def view_rect(self, margin: int = 0, alpha: float = 1.0) -> Rect:
+        """
+        カメラに映っている範囲をワールド座標で返す関数
+        引数1: 上下左右に広げる幅
+        引数2: 直前のステップ開始時の位置(0.0)から現在の位置(1.0)までの補間率
+        """
+        rect = Rect(0, 0, self.screen.get_width() + margin * 2, self.screen.get_height() + margin * 2)
+        if alpha >= 1.0:
+            rect.center = self.center_pos
+        else:
+            rect.center = (self.prev_center_pos[0] + (self.center_pos[0] - self.prev_center_pos[0]) * alpha,
+                           self.prev_center_pos[1] + (self.center_pos[1] - self.prev_center_pos[1]) * alpha)
+        return rect
+
     def is_in_camera(self, pos: tuple[int, int]) -> tuple[bool, bool]:
         return (
             self.center_pos[0] - self.screen.get_width() / 2 <= pos[0] <= self.center_pos[0] + self.screen.get_width() / 2,
@@ -58,31 +102,52 @@ class Group_support_camera(pg.sprite.Group):
     """
     def __init__(self, *sprites: Sprite | Sequence[Sprite]) -> None:
         super().__init__(*sprites)
+        # 当たり判定の絞り込みに使うグリッド（Noneなら総当たりで判定する）
+        self.spatial_index: SpatialHash | None = None
+        # 直前のdrawで描画した数と画面外のため描画しなかった数
+        self.drawn_count = 0
+        self.culled_count = 0
+        # 直前のシミュレーションステップ開始時の各Spriteの位置（描画時の補間用）
+        self._prev_pos: dict[Sprite, tuple[int, int]] = {}
+
+    def snapshot(self) -> None:
+        """
+        各Spriteの現在の位置を補間用に記録する関数（シミュレーションステップの前に呼ぶ）
+        """
+        self._prev_pos = {sprite: sprite.rect.topleft for sprite in self.sprites()}
 
-    def draw(self, surface: Surface) -> List[Rect]:
+    def draw(self, surface: Surface, alpha: float = 1.0) -> List[Rect]:
         """
-        グループ内にあるSpriteをカメラ位置に合わせて描画する関数
+        グループ内にあるSpriteのうちカメラに映るものだけを、カメラ位置に合わせて描画する関数
         引数1: 描画先のSurface
+        引数2: 直前のステップ開始時の位置(0.0)から現在の位置(1.0)までの補間率
+        戻り値: 描画した範囲（画面座標）のリスト
         """
         camera = Camera.active_camera
-        # カメラ位置だけSprite達をずらす
-        for sprite in self.sprites():
-            sprite.rect.move_ip(
-                -camera.center_pos[0] + camera.screen.get_width() / 2,
-                -camera.center_pos[1] + camera.screen.get_height() / 2
-            )
-
-        # 描画
-        rst = super().draw(surface)
-
-        # 動かしたSprite達の位置を戻す
-        for sprite in self.sprites():
-            sprite.rect.move_ip(
-                camera.center_pos[0] - camera.screen.get_width() / 2,
-                camera.center_pos[1] - camera.screen.get_height() / 2
-            )
-
-        return rst
+        view = camera.view_rect(alpha=alpha)
+        offset_x, offset_y = -view.left, -view.top
+        colliderect = view.colliderect
+        blit_list = []
+        if alpha >= 1.0 or not self._prev_pos:
+            for sprite in self.sprites():
+                rect = sprite.rect
+                if colliderect(rect):
+                    blit_list.append((sprite.image, rect.move(offset_x, offset_y)))
+        else:
+            prev_pos = self._prev_pos
+            for sprite in self.sprites():
+                rect = sprite.rect
+                prev = prev_pos.get(sprite)
+                if prev is not None:
+                    rect = Rect(int(prev[0] + (rect.x - prev[0]) * alpha),
+                                int(prev[1] + (rect.y - prev[1]) * alpha),
+                                rect.width, rect.height)
+                if colliderect(rect):
+                    blit_list.append((sprite.image, rect.move(offset_x, offset_y)))
+        self.drawn_count = len(blit_list)
+        self.culled_count = len(self) - self.drawn_count
+        surface.blits(blit_list, False)
+        return [rect for _, rect in blit_list]
     
 class MoveArea():
     width: int = 4000
@@ -109,12 +174,22 @@ class Character(pg.sprite.Sprite):
         引数4: ダメージを受けた際に無敵になるフレーム数（任意）
         """
         super().__init__()
+        self.setup_character(image, position, hp, max_invincible_sec)
+
+    def setup_character(self, image: Surface, position: tuple[int, int], hp: int, max_invincible_sec=0) -> None:
+        """
+        キャラの状態を初期化する関数（プールから再利用する際にも呼ばれる）
+        引数は__init__と同じ
+        """
         self.max_hp = hp
         self.hp = hp
         self.max_invincible_tick = max_invincible_sec
-        self.invincible_tmr = -1
-        self._imgs: dict[int, list[Surface, (int | None)]] = {}
+        self.is_invincible = False
+        # プールから再利用した場合は前の予約を取り消す
+        self.cancel_timers()
+        self._imgs: dict[int, Surface] = {}
         self.set_image(image, 0)
+        self.image = image
         self.rect = image.get_rect()
         self.rect.center = position
     
@@ -125,7 +200,44 @@ class Character(pg.sprite.Sprite):
         引数2: 画像の優先度。数値が高いほど優先して表示される。（ダメージを受けた際に数秒間だけ基本画像から変更したいときに便利）
         引数3: 画像を描画する期間（Noneで無期限になります）
         """
-        self._imgs[priority] = [image, valid_time]
+        self._imgs[priority] = image
+        if valid_time is None:
+            self.cancel_timer(("image", priority))
+        else:
+            self.schedule(("image", priority), valid_time, self._imgs.pop, priority, None)
+
+    def schedule(self, name: Hashable, delay: float, callback: Callable, *args, interval: float | None = None) -> Timer:
+        """
+        キャラの処理をdelay秒後に実行するよう予約する関数（同じ名前の予約が残っていれば取り消す）
+        引数1: 予約の名前
+        引数2: 実行までの秒数
+        引数3: 実行する関数
+        残りの引数: callbackに渡す引数
+        interval: 指定するとその間隔で繰り返し実行する
+        戻り値: 予約したTimer
+        """
+        self.cancel_timer(name)
+        scheduler = Scheduler.active_scheduler
+        if interval is None:
+            timer = scheduler.call_later(delay, callback, *args)
+        else:
+            timer = scheduler.every(interval, callback, *args, delay=delay)
+        self._timers[name] = timer
+        return timer
+
+    def cancel_timer(self, name: Hashable) -> None:
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+
+    def cancel_timers(self) -> None:
+        """
+        予約中の処理を全て取り消す関数（プールへ戻す時・再利用する時に呼ぶ）
+        """
+        for timer in getattr(self, "_timers", {}).values():
+            timer.cancel()
+        # 予約中の処理 {名前: Timer}
+        self._timers: dict[Hashable, Timer] = {}
 
     def give_damage(self, damage: int) -> int:
         """
@@ -133,9 +245,11 @@ class Character(pg.sprite.Sprite):
         引数1: ダメージ
         戻り値: 減った後のHP
         """
-        if self.invincible_tmr <= 0:
+        if not self.is_invincible:
             self.hp -= damage
-            self.invincible_tmr = self.max_invincible_tick
+            if self.max_invincible_tick > 0:
+                self.is_invincible = True
+                self.schedule("invincible", self.max_invincible_tick, self._end_invincible)
             self.damaged()
         if self.hp <= 0:
             self.kill()
@@ -149,29 +263,18 @@ class Character(pg.sprite.Sprite):
         volume_range = 1500
         volume = max((volume_range - calc_norm(self.rect.center, Camera.active_camera.center_pos)) / volume_range, 0)
         if self.hp > 0:
-            sound = pg.mixer.Sound("./fig/se_enemy_damage.mp3")
-            sound.set_volume(volume)
-            sound.play()
+            SoundBank.play("enemy_damage", volume)
         else:
-            sound = pg.mixer.Sound("./fig/se_enemy_death.mp3")
-            sound.set_volume(volume)
-            sound.play()
+            SoundBank.play("enemy_death", volume)
 
-    def update(self, delta_time: float):
-        # 無敵時間を減らす処理
-        self.invincible_tmr = max(self.invincible_tmr - delta_time, -1)
+    def _end_invincible(self) -> None:
+        self.is_invincible = False
 
-        # 表示する画像周りの処理
+    def update(self, delta_time: float):
+        # 表示する画像周りの処理（有効期間が過ぎた画像はスケジューラが取り除く）
         if len(self._imgs) > 0:
             # 優先度が最も高い画像を描画
-            idx = max(self._imgs)
-            self.image = self._imgs[idx][0]
-            # 画像の有効時間を減らす処理
-            if self._imgs[idx][1] != None:
-                if self._imgs[idx][1] < 0:
-                    del self._imgs[idx]
-                    return
-                self._imgs[idx][1] -= delta_time
+            self.image = self._imgs[max(self._imgs)]
 
 
 def calc_orientation(org: tuple[int, int], dst: tuple[int, int]) -> tuple[float, float]:
@@ -228,25 +331,26 @@ class Player(Character):
         引数2: hp(任意)
         引数3: ダメージを受けた際の無敵時間（任意）
         """
-        img0 = pg.transform.rotozoom(
-            pg.image.load(f"./fig/3.png"), 0, self.IMAGE_SCALE)
-        img = pg.transform.flip(img0, True, False)
+        path = "./fig/3.png"
+        # 右向き（左右反転した画像）と左向き（元画像）を45°刻みで回転した画像
+        right = Assets.rotations(Assets.transform(path, self.IMAGE_SCALE, flip_x=True), 8)
+        left = Assets.rotations(Assets.transform(path, self.IMAGE_SCALE), 8, image_angle=180)
         self.move_imgs = {
-            (+1, 0): img,  # 右
-            (+1, -1): pg.transform.rotozoom(img, 45, 1.0),  # 右上
-            (0, -1): pg.transform.rotozoom(img, 90, 1.0),  # 上
-            (-1, -1): pg.transform.rotozoom(img0, -45, 1.0),  # 左上
-            (-1, 0): img0,  # 左
-            (-1, +1): pg.transform.rotozoom(img0, 45, 1.0),  # 左下
-            (0, +1): pg.transform.rotozoom(img, -90, 1.0),  # 下
-            (+1, +1): pg.transform.rotozoom(img, -45, 1.0),  # 右下
+            (+1, 0): right.get(0),  # 右
+            (+1, -1): right.get(45),  # 右上
+            (0, -1): right.get(90),  # 上
+            (-1, -1): left.get(135),  # 左上
+            (-1, 0): left.get(180),  # 左
+            (-1, +1): left.get(225),  # 左下
+            (0, +1): right.get(-90),  # 下
+            (+1, +1): right.get(-45),  # 右下
         }
         self.dire = (1, 0)
         super().__init__(self.move_imgs[self.dire], xy ,hp, max_invincible_sec)
         self.speed = 500
         self.attack_interval = 1
         self.attack_number = 1
-        effect_group.add(HP_Bar(self))
+        effect_group.add(HP_Bar.create(self, always_show=True))
 
     def change_img(self, num: int, priority: int, life: int | None = None):
         """
@@ -255,7 +359,7 @@ class Player(Character):
         引数2: 画像の優先度
         引数3: 表示する期間（Noneで無期限）
         """
-        self.set_image(pg.transform.rotozoom(pg.image.load(f"./fig/{num}.png"), 0, self.IMAGE_SCALE), priority, life)
+        self.set_image(Assets.transform(f"./fig/{num}.png", self.IMAGE_SCALE), priority, life)
 
     def damaged(self):
         """
@@ -298,12 +402,34 @@ class Player(Character):
         pass
 
 
-class Bullet(pg.sprite.Sprite):
+class Bullet(pg.sprite.Sprite, Pooled):
     """
-    弾に関するクラス
+    弾に関するクラス（Bullet.createで生成するとkillされたものを再利用する）
     """
 
-    def __init__(self,
+    pool = ObjectPool("bullet")
+    # 弾の画像を事前に回転しておく角度の刻み数
+    ROTATION_STEPS = 64
+    # ECSで弾を持つアーキタイプの構成要素（Entity_Groupで使う）
+    COMPONENTS = {
+        "pos": ("f8", (2,)),
+        "prev_pos": ("f8", (2,)),
+        "vel": ("f8", (2,)),
+        "life": ("f8", ()),
+        "damage": ("i4", ()),
+        "image": ("i4", ()),
+        "size": ("i4", (2,)),
+        "cull": ("?", ()),
+    }
+
+    def __init__(self, *args, **kwargs):
+        """
+        銃弾Surfaceを生成する（引数はresetと同じ）
+        """
+        super().__init__()
+        self.reset(*args, **kwargs)
+
+    def reset(self,
                  image: Surface,
                  position: tuple[int, int],
                  direction: tuple[float, float],
@@ -312,19 +438,18 @@ class Bullet(pg.sprite.Sprite):
                  damage: int=10,
                  life_sec=5,
                  is_fix_rotation_img=False,
-                 is_destoroy_when_off_screen=False):
+                 is_destoroy_when_off_screen=False,
+                 image_angle: float = 0):
         """
-        銃弾Surfaceを生成する
-        引数1: スポーン位置
-        引数2: 飛ばす方向
+        銃弾の状態を初期化する
+        引数1: 画像
+        引数2: スポーン位置
+        引数3: 飛ばす方向
+        引数4: 当たり判定を行う相手のグループ
+        引数11: 画像が向いている方向（度、右が0で反時計回り）
         """
-        super().__init__()
         self.vx, self.vy = direction
-        self.image = image
-        if not is_fix_rotation_img:
-            angle = math.degrees(math.atan2(-self.vy, self.vx))
-            self.image = pg.transform.rotozoom(image, angle, 1)
-            self.image.set_colorkey((0,0,0))
+        self.image = self.oriented_image(image, direction, is_fix_rotation_img, image_angle)
         self.rect = self.image.get_rect()
         self.rect.center = position
         self.speed = speed
@@ -334,9 +459,60 @@ class Bullet(pg.sprite.Sprite):
         self.max_life_sec = life_sec
         self.isdestoroy_when_off_screen = is_destoroy_when_off_screen
 
-    def update(self, dtime: float, score: "Score"):
+    def kill(self) -> None:
+        super().kill()
+        self.pool.release(self)
+
+    @classmethod
+    def oriented_image(cls,
+                       image: Surface,
+                       direction: tuple[float, float],
+                       is_fix_rotation_img=False,
+                       image_angle: float = 0) -> Surface:
+        """
+        飛ばす方向に向けた画像を返す関数（事前に回転しておいた画像から進行方向に最も近いものを使う）
+        引数はresetと同じ
+        """
+        if is_fix_rotation_img:
+            return image
+        return Assets.rotations(image, cls.ROTATION_STEPS, image_angle, (0,0,0)).get_by_vector(*direction)
+
+    @classmethod
+    def spawn(cls,
+              group: "pg.sprite.Group | Entity_Group",
+              image: Surface,
+              position: tuple[int, int],
+              direction: tuple[float, float],
+              attackable_group: pg.sprite.Group,
+              speed=500,
+              damage: int=10,
+              life_sec=5,
+              is_fix_rotation_img=False,
+              is_destoroy_when_off_screen=False,
+              image_angle: float = 0) -> None:
+        """
+        銃弾を生成してgroupに追加する関数（引数2以降はresetと同じ）
+        groupがEntity_Groupなら、Bulletを作らずにCOMPONENTSの値を直接書き込む
+        引数1: 追加先のグループ
+        """
+        if not isinstance(group, Entity_Group):
+            group.add(cls.create(image, position, direction, attackable_group, speed, damage, life_sec,
+                                 is_fix_rotation_img, is_destoroy_when_off_screen, image_angle))
+            return
+        image = cls.oriented_image(image, direction, is_fix_rotation_img, image_angle)
+        group.spawn(pos=position,
+                    prev_pos=position,
+                    vel=(speed * direction[0], speed * direction[1]),
+                    life=life_sec,
+                    damage=damage,
+                    image=group.world.image_handle(image),
+                    size=image.get_size(),
+                    cull=is_destoroy_when_off_screen)
+
+    def update(self, dtime: float, damage_events: DamageEvents):
         """
         銃弾を移動させる
+        引数2: 当たった相手へのダメージを記録する先
         """
         # 移動
         self.rect.move_ip(self.speed * self.vx * dtime, self.speed * self.vy * dtime)
@@ -347,82 +523,128 @@ class Bullet(pg.sprite.Sprite):
         self.life_tmr += dtime
 
         # 衝突判定
-        for damage_target in pg.sprite.spritecollide(self, self.attackable_group, False):
+        for damage_target in spatial.spritecollide(self, self.attackable_group):
+            # ダメージはまとめて与えるので、前の銃弾で倒れる相手はまだグループに残っている
+            if damage_events.is_doomed(damage_target):
+                continue
             self.kill()
-
-            damage_target = cast(Character, damage_target)
-            damage_target.give_damage(self.damage)
-            # TODO: Enemy_Baseに依存させるのは良くないのでIScoreable的なのを作ってそこに依存させる
-            if damage_target.hp <= 0 and issubclass(type(damage_target), Enemy_Base):
-                score.score_up(damage_target.get_score())
+            # ダメージとスコアはGame.resolve_damageでまとめて処理する
+            damage_events.hit(damage_target, self.damage, self)
 
 
 def gen_beams(image: Surface,
               player: Player, 
               target_angle: float, 
               attackable_group: pg.sprite.Group, 
+              bullet_group: "pg.sprite.Group | Entity_Group",
               speed=500,
               damage=10,
               life_sec=5,
               bullet_count=1, 
-              angle_range=30) -> list[Bullet]:
+              angle_range=30) -> None:
     """
     gen_beams関数で，
-    ‐30°～+31°の角度の範囲で指定ビーム数の分だけBeamオブジェクトを生成し，
-    リストにappendする → リストを返す
+    ‐30°～+31°の角度の範囲で指定ビーム数の分だけ銃弾を生成し，
+    bullet_groupに追加する（Bullet.spawnを使う）
     """
     interval_rad = math.radians(angle_range) / (bullet_count - 1) if bullet_count != 1 else 0
     rad_range = interval_rad * (bullet_count - 1) if bullet_count != 0 else 0
 
-    bullets: list[Bullet] = []
     for i in range(bullet_count):
         rad = i * interval_rad - rad_range / 2 + math.radians(target_angle)
-        bullets.append(Bullet(image, player.rect.center, (math.cos(rad), math.sin(rad)), attackable_group, speed, damage, life_sec, is_destoroy_when_off_screen=True))
-    return bullets
+        Bullet.spawn(bullet_group, image, player.rect.center, (math.cos(rad), math.sin(rad)), attackable_group, speed, damage, life_sec, is_destoroy_when_off_screen=True)
 
-class Enemy_Base(Character):
+class Enemy_Base(Character, Pooled):
+    """
+    敵の基底クラス（createで生成するとkillされたものを再利用する）
+    """
     def __init__(self,
                  image: Surface,
                  position: tuple[int, int],
                  hp: int,
                  effect_group: pg.sprite.Group,
                  max_invincible_sec=0,
-                 score=0) -> None:
+                 score=0,
+                 swarm: Swarm | None = None) -> None:
         super().__init__(image, position, hp, max_invincible_sec)
+        self.setup_enemy_base(effect_group, score, swarm)
+
+    def setup_enemy_base(self, effect_group: pg.sprite.Group, score=0, swarm: Swarm | None = None) -> None:
+        """
+        敵共通の状態を初期化する関数（プールから再利用する際にも呼ばれる）
+        """
         self.effect_group = effect_group
         self._score = score
-        self.effect_group.add(HP_Bar(self))
+        # 移動をまとめて計算する群れ（Noneなら自分のupdateで移動する）
+        self.swarm = swarm
+        self.hp_bar = HP_Bar.create(self)
+        self.effect_group.add(self.hp_bar)
     
     def get_score(self) -> int:
         return self._score
 
+    def kill(self) -> None:
+        if ObjectPool.is_free(self):
+            return
+        super().kill()
+        self.cancel_timers()
+        if self.swarm is not None:
+            self.swarm.remove(self)
+        self.hp_bar.kill()
+        self.pool.release(self)
+
 
 class Enemy(Enemy_Base):
     """
     敵に関するクラス
     """
+    # 敵画像の幅・高さの候補（スポーン毎に拡大縮小しないよう事前に決めたサイズから選ぶ）
+    IMAGE_SIZES = (90, 105, 120, 135, 150)
+
     # TODO: グループ周りの引数が多すぎるのでなんとかしたい
     # （この規模ならGameManagerクラスを作って、グループ達をそのクラス変数として持たせてどこからもアクセス出来るようにしてもいいかも）
-    def __init__(self, spawn_point: list[int, int], attack_target: Character, effect_group:pg.sprite.Group, hp=20, score=30, speed=100):
+    STOP_DISTANCE = 50
+
+    pool = ObjectPool("enemy")
+
+    def __init__(self, spawn_point: list[int, int], attack_target: Character, effect_group:pg.sprite.Group, hp=20, score=30, speed=100, swarm: Swarm | None = None, image: Surface | None = None):
         """
         敵を生成する関数
         引数3: 攻撃を加える対象
+        引数7: 移動をまとめて計算する群れ（任意）
+        引数8: 画像（Noneなら乱数で選ぶ）
+        """
+        super().__init__(image if image is not None else self._random_image(), spawn_point, hp, effect_group, score=score, swarm=swarm)
+        self.setup_enemy(attack_target, speed, swarm)
+
+    def reset(self, spawn_point: list[int, int], attack_target: Character, effect_group:pg.sprite.Group, hp=20, score=30, speed=100, swarm: Swarm | None = None, image: Surface | None = None):
         """
-        imgs = [pg.image.load(f"./fig/zonbi{i}.png") for i in range(1, 4)]
-        imgs[0] = pg.transform.scale(imgs[0],(random.randint(90,150),random.randint(90,150)))
-        imgs[1] = pg.transform.scale(imgs[1],(random.randint(90,150),random.randint(90,150)))
-        imgs[2] = pg.transform.scale(imgs[2],(random.randint(90,150),random.randint(90,150)))
-        super().__init__(random.choice(imgs), spawn_point, hp, effect_group, score=score)
+        プールから再利用する敵の状態を初期化する関数（引数は__init__と同じ）
+        """
+        self.setup_character(image if image is not None else self._random_image(), spawn_point, hp)
+        self.setup_enemy_base(effect_group, score, swarm)
+        self.setup_enemy(attack_target, speed, swarm)
+
+    def setup_enemy(self, attack_target: Character, speed: float, swarm: Swarm | None) -> None:
         self.speed = speed
         self.attack_target = attack_target
+        if swarm is not None:
+            swarm.add(self, speed, self.STOP_DISTANCE, attack_target)
+
+    @classmethod
+    def _random_image(cls) -> Surface:
+        return Assets.scaled(f"./fig/zonbi{random.randint(1, 3)}.png",
+                             (random.choice(cls.IMAGE_SIZES), random.choice(cls.IMAGE_SIZES)))
 
     def update(self, dtime):
         """
         敵を移動させる関数
         """
         super().update(dtime)
+        if self.swarm is not None:
+            return
         # 攻撃対象に近づき過ぎたら止まる（0割り対策）
-        if calc_norm(self.rect, self.attack_target.rect) < 50:
+        if calc_norm(self.rect, self.attack_target.rect) < self.STOP_DISTANCE:
             return
         dir = list(calc_orientation(self.rect, self.attack_target.rect))
         self.rect.move_ip(dir[0] * self.speed * dtime, dir[1] * self.speed * dtime)
@@ -433,6 +655,11 @@ class BOSS(Enemy_Base):
     ボスに関するクラス
     """
     ATTACK_INTERVAL_SEC = 0.3
+    STOP_DISTANCE = 500
+    # 炎を進行方向に向けるかどうか（炎の画像は上向き）
+    ROTATE_FLAME = False
+
+    pool = ObjectPool("boss")
 
     def __init__(self,
                  spawn_point: list[int, int],
@@ -441,71 +668,149 @@ class BOSS(Enemy_Base):
                  enemy_bullet_group: pg.sprite.Group,
                  hp=100,
                  score=40,
-                 speed=200):
+                 speed=200,
+                 swarm: Swarm | None = None):
         """
         ボスを生成する関数
         引数3: 攻撃を加える対象
+        引数8: 移動をまとめて計算する群れ（任意）
+        """
+        super().__init__(Assets.transform("./fig/alien2.png", 3.0), spawn_point, hp, effect_group, score=score, swarm=swarm)
+        self.setup_boss(attack_target, enemy_bullet_group, speed, swarm)
+
+    def reset(self,
+              spawn_point: list[int, int],
+              attack_target: Character,
+              effect_group:pg.sprite.Group,
+              enemy_bullet_group: pg.sprite.Group,
+              hp=100,
+              score=40,
+              speed=200,
+              swarm: Swarm | None = None):
         """
-        super().__init__((pg.transform.rotozoom((pg.image.load(f"./fig/alien2.png")), 0.0, 3.0)), spawn_point, hp, effect_group, score=score)
+        プールから再利用するボスの状態を初期化する関数（引数は__init__と同じ）
+        """
+        self.setup_character(Assets.transform("./fig/alien2.png", 3.0), spawn_point, hp)
+        self.setup_enemy_base(effect_group, score, swarm)
+        self.setup_boss(attack_target, enemy_bullet_group, speed, swarm)
+
+    def setup_boss(self, attack_target: Character, enemy_bullet_group: pg.sprite.Group, speed: float, swarm: Swarm | None) -> None:
         self.speed = speed
         self.attack_target = attack_target
         self.enemy_bullet_group = enemy_bullet_group
-        self._attack_interval_tmr = 0.0
-        self.bullet_img = pg.transform.rotozoom((pg.image.load("./fig/flame.png")), 0, 0.1)
+        self.bullet_img = Assets.transform("./fig/flame.png", 0.1)
+        if swarm is not None:
+            # 射撃位置をrectから求めるので画面外でも位置を反映する
+            swarm.add(self, speed, self.STOP_DISTANCE, attack_target, always_sync=True)
+        # 一定間隔で射撃を行う
+        self.schedule("attack", self.ATTACK_INTERVAL_SEC, self.attack, interval=self.ATTACK_INTERVAL_SEC)
+
+    def is_moving(self) -> bool:
+        """
+        攻撃対象に向かって移動中かどうかを返す関数
+        """
+        if self.swarm is not None:
+            return self.swarm.is_moving(self)
+        # 攻撃対象に近づき過ぎたら止まる（0割り対策）
+        return calc_norm(self.rect, self.attack_target.rect) >= self.STOP_DISTANCE
+
+    def attack(self) -> None:
+        """
+        移動中なら攻撃対象に向けて炎を撃つ関数（スケジューラから一定間隔で呼ばれる）
+        """
+        if not self.is_moving():
+            return
+        direction = calc_orientation(self.rect.midbottom, self.attack_target.rect.center)
+        Bullet.spawn(self.enemy_bullet_group, self.bullet_img, self.rect.midbottom, direction, self.attack_target.groups()[0], is_fix_rotation_img=not self.ROTATE_FLAME, life_sec=10, image_angle=90)
 
     def update(self, delta_time: float):
         """
         ボスを移動させる関数
         """
         super().update(delta_time)
-
-        # 攻撃対象に近づき過ぎたら止まる（0割り対策）
-        if calc_norm(self.rect, self.attack_target.rect) < 500:
+        if self.swarm is not None or not self.is_moving():
             return
         dir = list(calc_orientation(self.rect, self.attack_target.rect))
         self.rect.move_ip(dir[0] * self.speed * delta_time, dir[1] * self.speed * delta_time)
 
-        # 一定間隔で射撃を行う
-        if self._attack_interval_tmr > self.ATTACK_INTERVAL_SEC:
-            direction = calc_orientation(self.rect.midbottom, self.attack_target.rect.center)  
-            self.enemy_bullet_group.add(Bullet(self.bullet_img, self.rect.midbottom, direction, self.attack_target.groups()[0], is_fix_rotation_img=True, life_sec=10))
-            self._attack_interval_tmr = 0
-        self._attack_interval_tmr += delta_time
-
 
-class Background(pg.sprite.Sprite):
+class Background:
     """
     背景に関するクラス
+    背景画像を敷き詰め、カメラに映るマスだけを描画する
     """
-    def __init__(self, camera: Camera, offset: tuple[int, int]) -> None:
+    def __init__(self, camera: Camera, path: str = "./fig/background.png", use_cache: bool = True) -> None:
         """
         背景を生成する関数
         引数1: カメラ
-        引数2: 背景のデフォルト生成位置からどれだけずらすか
+        引数2: 敷き詰める画像のパス
+        引数3: 映るマスをまとめた画像を作っておき、カメラがマスの境界を越えたときだけ作り直すかどうか
         """
-        super().__init__()
-        self.image = pg.image.load("./fig/background.png")
-        self.rect = self.image.get_rect()
-        self.rect.topleft = (0, 0)
-        self.offset = offset
+        self.image = Assets.image(path, alpha=False)
+        self.tile_width, self.tile_height = self.image.get_size()
         self.camera = camera
-
-    def update(self) -> None:
+        self.use_cache = use_cache
+        # カメラに映るマスの範囲（左端の列, 上端の行, 列数, 行数）
+        self.tiles = (0, 0, 0, 0)
+        self._cache: Surface | None = None
+        self._cache_tiles: tuple[int, int, int, int] | None = None
+        self.tile_count = 0
+        self.rebuild_count = 0
+        # 直前に描画した時のカメラに映る範囲の左上（背景が変わったかの判定用）
+        self._drawn_view_pos: tuple[int, int] | None = None
+
+    def update(self, alpha: float = 1.0) -> None:
         """
-        カメラの位置に合わせて背景を動かす関数
+        カメラの位置からカメラに映るマスを求める関数
+        引数1: カメラ位置の補間率
+        """
+        view = self.camera.view_rect(alpha=alpha)
+        col0 = view.left // self.tile_width
+        row0 = view.top // self.tile_height
+        col1 = (view.right - 1) // self.tile_width
+        row1 = (view.bottom - 1) // self.tile_height
+        self.tiles = (col0, row0, col1 - col0 + 1, row1 - row0 + 1)
+        self.tile_count = self.tiles[2] * self.tiles[3]
+
+    def _build_cache(self) -> None:
+        col0, row0, cols, rows = self.tiles
+        size = (cols * self.tile_width, rows * self.tile_height)
+        if self._cache is None or self._cache.get_size() != size:
+            self._cache = Surface(size).convert() if pg.display.get_surface() is not None else Surface(size)
+        self._cache.blits([(self.image, (i * self.tile_width, j * self.tile_height))
+                           for i in range(cols) for j in range(rows)], False)
+        self._cache_tiles = self.tiles
+        self.rebuild_count += 1
+
+    def draw(self, screen: Surface, alpha: float = 1.0) -> List[Rect]:
+        """
+        カメラに映るマスを描画する関数
+        引数1: 描画先のSurface
+        引数2: カメラ位置の補間率
+        戻り値: 前回の描画から見た目が変わった範囲のリスト（カメラが動いていなければ空）
         """
-        super().update()
-        x_offset = self.offset[0]
-        if self.camera.center_pos[0] != 0:
-            x_offset += self.camera.center_pos[0] // self.rect.width
-        y_offset = self.offset[1]
-        if self.camera.center_pos[1] != 0:
-            y_offset += self.camera.center_pos[1] // self.rect.height
-        self.rect.topleft = (x_offset * self.rect.width,
-                             y_offset * self.rect.height)
+        self.update(alpha)
+        view = self.camera.view_rect(alpha=alpha)
+        col0, row0, cols, rows = self.tiles
+        x0 = col0 * self.tile_width - view.left
+        y0 = row0 * self.tile_height - view.top
+        if self.use_cache:
+            if self._cache_tiles != self.tiles:
+                self._build_cache()
+            screen.blit(self._cache, (x0, y0))
+        else:
+            screen.blits([(self.image, (x0 + i * self.tile_width, y0 + j * self.tile_height))
+                          for i in range(cols) for j in range(rows)], False)
+        if self._drawn_view_pos == view.topleft:
+            return []
+        self._drawn_view_pos = view.topleft
+        return [screen.get_rect()]
 
 
-class HP_Bar(pg.sprite.Sprite):
+class HP_Bar(pg.sprite.Sprite, Pooled):
+    """
+    キャラの頭上に表示するHPバー（HP_Bar.createで生成するとkillされたものを再利用する）
+    """
     _BAR_COLOR = (255, 0, 0)
     _BAR_BACKGROUND_COLOR = (0, 0, 0)
 
@@ -513,25 +818,147 @@ class HP_Bar(pg.sprite.Sprite):
         percent = self.target_character.hp / self.target_character.max_hp
         self.image.fill(self._BAR_BACKGROUND_COLOR)
         pg.draw.rect(self.image, self._BAR_COLOR, pg.Rect(0, 0, self.image.get_width() * percent, self.image.get_height()))
+        self._drawn_hp = self.target_character.hp
+
+    def refresh(self) -> bool:
+        """
+        前回描いた時からHPが変わっていれば画像を描き直す関数
+        戻り値: 描き直したならTrue
+        """
+        if self._drawn_hp == self.target_character.hp:
+            return False
+        self.update_image()
+        return True
 
-    def __init__(self, target_character: Character, width: int=100, height: int=10, offset_y:int=10) -> None:
+    pool = ObjectPool("hp_bar")
+
+    def __init__(self, target_character: Character, width: int=100, height: int=10, offset_y:int=10, always_show=False) -> None:
         super().__init__()
-        self.target_character = target_character
         self.image = pg.Surface((width, height))
+        self.reset(target_character, width, height, offset_y, always_show)
+
+    def reset(self, target_character: Character, width: int=100, height: int=10, offset_y:int=10, always_show=False) -> None:
+        """
+        HPバーの状態を初期化する関数（引数は__init__と同じ）
+        引数5: HPが満タンでも表示するかどうか（HP_Bar_Groupで描画する場合）
+        """
+        self.target_character = target_character
+        self.always_show = always_show
+        if self.image.get_size() != (width, height):
+            self.image = pg.Surface((width, height))
         self.update_image()
         self.rect = self.image.get_rect()
         self.offset_y = offset_y
 
         self.rect.midbottom = self.target_character.rect.midtop
         self.rect.y -= offset_y
-    
-    def update(self, delta_time: float) -> None:
-        self.rect.midbottom = self.target_character.rect.midtop
-        self.rect.y -= self.offset_y
-        self.update_image()
 
-        if self.target_character.hp <= 0:
-            self.kill()
+    def kill(self) -> None:
+        super().kill()
+        self.pool.release(self)
+
+
+class HP_Bar_Group(Group_support_camera):
+    """
+    HPバーをまとめて描画するグループ
+    バーの位置は描画時にキャラの位置から求め、HPが変わったバーだけ画像を描き直す。
+    HPが満タンのバーとカメラに映らないバーは描画しない
+    """
+
+    # HPが満タンのバーを表示しない（always_showのバーは除く）
+    HIDE_FULL_HP = True
+
+    def __init__(self, *sprites: Sprite | Sequence[Sprite]) -> None:
+        super().__init__(*sprites)
+        # 直前のdrawで画像を描き直したバーの数
+        self.redraw_count = 0
+
+    def snapshot(self) -> None:
+        self._prev_pos = {bar: bar.target_character.rect.midtop for bar in self.sprites()}
+
+    def update(self, *args) -> None:
+        """
+        バーの位置と画像は描画時に更新するので何もしない
+        """
+
+    def draw(self, surface: Surface, alpha: float = 1.0) -> List[Rect]:
+        """
+        カメラに映るキャラのHPバーを描画する関数
+        引数1: 描画先のSurface
+        引数2: 直前のステップ開始時の位置(0.0)から現在の位置(1.0)までの補間率
+        戻り値: 描画した範囲（画面座標）のリスト
+        """
+        view = Camera.active_camera.view_rect(alpha=alpha)
+        offset_x, offset_y = -view.left, -view.top
+        colliderect = view.colliderect
+        prev_pos = self._prev_pos if alpha < 1.0 else {}
+        hide_full_hp = self.HIDE_FULL_HP
+        blit_list = []
+        redraw_count = 0
+        for bar in self.sprites():
+            target = bar.target_character
+            if hide_full_hp and not bar.always_show and target.hp >= target.max_hp:
+                continue
+            x, y = target.rect.midtop
+            prev = prev_pos.get(bar)
+            if prev is not None:
+                x = int(prev[0] + (x - prev[0]) * alpha)
+                y = int(prev[1] + (y - prev[1]) * alpha)
+            rect = bar.rect
+            rect.midbottom = (x, y - bar.offset_y)
+            if not colliderect(rect):
+                continue
+            if bar.refresh():
+                redraw_count += 1
+            blit_list.append((bar.image, rect.move(offset_x, offset_y)))
+        self.drawn_count = len(blit_list)
+        self.culled_count = len(self) - self.drawn_count
+        self.redraw_count = redraw_count
+        surface.blits(blit_list, False)
+        return [rect for _, rect in blit_list]
+
+
+class Entity_Group:
+    """
+    ECSのアーキタイプをGroup_support_cameraと同じように描画できるようにするアダプタ
+    エンティティはSpriteを経由せずにspawnで構成要素の値から直接生成する（Bullet.spawnを参照）
+    """
+
+    def __init__(self, world: ecs.World, name: str, components: dict[str, tuple[str, tuple[int, ...]]]) -> None:
+        """
+        引数1: エンティティを持つWorld
+        引数2: アーキタイプの名前
+        引数3: アーキタイプの構成要素（Bullet.COMPONENTSなど）
+        """
+        self.world = world
+        self.archetype = world.define(name, components)
+        self.drawn_count = 0
+        self.culled_count = 0
+
+    def __len__(self) -> int:
+        return len(self.archetype)
+
+    def spawn(self, **values: Any) -> int:
+        """
+        構成要素の値からエンティティを生成する関数（省略した構成要素は0になる）
+        戻り値: エンティティの番号
+        """
+        return self.world.spawn(self.archetype, **values)
+
+    def snapshot(self) -> None:
+        ecs.snapshot_system([self.archetype])
+
+    def draw(self, surface: Surface, alpha: float = 1.0) -> List[Rect]:
+        """
+        カメラに映るエンティティだけを描画する関数
+        引数1: 描画先のSurface
+        引数2: 直前のステップ開始時の位置(0.0)から現在の位置(1.0)までの補間率
+        戻り値: 描画した範囲（画面座標）のリスト
+        """
+        drawn = ecs.render_system(self.world, self.archetype, surface, Camera.active_camera.view_rect(alpha=alpha), alpha)
+        self.drawn_count = len(drawn)
+        self.culled_count = len(self) - self.drawn_count
+        return drawn
 
 
 class Score:
@@ -539,20 +966,71 @@ class Score:
     倒した敵の数をスコアとして表示するクラス
     敵：30点
     """
+    FONT_SIZE = 50
+
     def __init__(self,camera:Camera):
-        self.font = pg.font.Font(None, 50)
         self.color = (255, 255, 255)
         self.score = 0
-        self.image = self.font.render(f"Score: {self.score}", 0, self.color)
+        self.image = Text.render(f"Score: {self.score}", self.FONT_SIZE, self.color)
         self.rect = self.image.get_rect()
         self.rect.center = 100, camera.screen.get_height() - 50
 
     def score_up(self, add):
         self.score += add
 
-    def update(self, screen: pg.Surface):
-        self.image = self.font.render(f"Score: {self.score}", 0, self.color)
-        screen.blit(self.image, self.rect)
+    def update(self, screen: pg.Surface) -> Rect:
+        return Text.draw_number(screen, self.score, self.FONT_SIZE, self.color, prefix="Score: ", center=self.rect.center)
+
+def preload_images(boss: bool = True) -> List[Surface]:
+    """
+    ゲームで使う画像（拡大縮小・反転したものを含む）を全てAssetsに読み込む関数（アトラスの生成・起動時の読み込み用）
+    引数1: Falseなら最初のウェーブで使わないボスとその攻撃の画像を読み込まない
+    戻り値: 読み込んだ画像のリスト
+    """
+    images = [Assets.transform(f"./fig/{num}.png", Player.IMAGE_SCALE) for num in range(10)]
+    images.append(Assets.transform("./fig/3.png", Player.IMAGE_SCALE, flip_x=True))
+    for num in range(1, 4):
+        for width in Enemy.IMAGE_SIZES:
+            for height in Enemy.IMAGE_SIZES:
+                images.append(Assets.scaled(f"./fig/zonbi{num}.png", (width, height)))
+    images.append(Assets.image("./fig/background.png", alpha=False))
+    images.append(Game.player_bullet_image())
+    if boss:
+        images.append(Assets.transform("./fig/alien2.png", 3.0))
+        images.append(Assets.transform("./fig/flame.png", 0.1))
+    return images
+
+
+# 最初のウェーブまでに読み込んでおく画像ファイル（./figのそれ以外の画像はゲームが始まってから読み込む）
+FIRST_WAVE_IMAGES = ([f"./fig/{num}.png" for num in range(10)]
+                     + [f"./fig/zonbi{num}.png" for num in range(1, 4)]
+                     + ["./fig/background.png"])
+
+
+def start_loading(directory: str = "./fig") -> AssetLoader:
+    """
+    directoryの画像と効果音を全てワーカースレッドでデコードし始める関数（ウィンドウ生成後に呼ぶ）
+    最初のウェーブで使うものと効果音は必須にし、拡大縮小した画像の生成もデコード後にメインスレッドで行う
+    効果音のデコードはゲームが始まった後に1つずつ行う（最初の再生時にまとめてデコードして止まらないように）
+    戻り値: 読み込みを進めるAssetLoader
+    """
+    loader = AssetLoader()
+    # 必須のものから順にデコードさせる
+    # アトラスに入っている画像の元のファイルは、アトラスに無い画像を作る時にしか使わない（その時はAssetsがその場で読み込む）ので読み込まない
+    for path in FIRST_WAVE_IMAGES:
+        if not Assets.in_atlas(path):
+            loader.image(path, alpha=path != "./fig/background.png", required=True)
+    for name in SoundBank.SOUNDS:
+        loader.sound(name, required=True)
+    for name in sorted(os.listdir(directory)):
+        path = f"{directory}/{name}"
+        if name.endswith((".png", ".jpg", ".gif")) and path not in FIRST_WAVE_IMAGES and not Assets.in_atlas(path):
+            loader.image(path)
+    loader.then(lambda: preload_images(boss=False), required=True)
+    for name in SoundBank.SOUNDS:
+        loader.then(lambda name=name: SoundBank.decode(name))
+    loader.then(preload_images)
+    return loader
 
 def get_random_spawn_pos(range: int=-1) -> tuple[int, int]:
     range = Camera.active_camera.screen.get_width() // 2 + 200 if range < 0 else range
@@ -561,281 +1039,696 @@ def get_random_spawn_pos(range: int=-1) -> tuple[int, int]:
     center_pos = Camera.active_camera.center_pos
     return [center_pos[0] + (spawn_dir[0] * range), center_pos[1] + (spawn_dir[1] * range)]
 
-def main():
-    max_fps = 60
-    dtime = 0 # 前のフレームからどのくらい経ったか
-    gameFlag = False
-
-    pg.display.set_caption("サバイブ")
-    screen = pg.display.set_mode((1600, 900))
-
-    # 様々な変数の初期化
-    effect_group = Group_support_camera()
-    player = Player([0, 0], effect_group)
-    camera = Camera(screen, player)
-    background = Group_support_camera()
-    for i in range(-2, 3):
-        for j in range(-1, 2):
-            background.add(Background(camera, (i, j)))
-    player_group = Group_support_camera(player)
-    bullets = Group_support_camera()
-    enemies = Group_support_camera()
-    flame = Group_support_camera()
-    clock = pg.time.Clock()
-    score = Score(camera)
-
-    player_shoot_interval_tmr = 0
-    enemy_spawn_interval_sec = 0.5
-    enemy_spawn_interval_tmr = 0
-    fast_enemy_spawn_interval_sec = 3
-    fast_enemy_spawn_interval_tmr = 0
-    boss_spawn_interval_sec = 3
-    boss_spawn_interval_tmr = 0
-    suvive_time_tmr = 0
-    score_thresholds = [90, 500, 1000, 4000]
-    next_score = score_thresholds[0]
-
-    is_muteki = False
-    is_disable_variable_fps = False
-    is_stop_time = False
+class Game:
+    """
+    ゲーム全体の状態と1フレーム分の処理をまとめたクラス
+    """
 
     SURVIVE_TIME_SEC = 60
+    SCORE_THRESHOLDS = [90, 500, 1000, 4000]
+    # 敵が進む向きを求めるフローフィールドのマスの大きさ[px]
+    FLOW_CELL_SIZE = 100
+    # 密集した敵どうしを離す速さ[px/秒]（0で離さない）
+    SEPARATION_SPEED = 60
+    # 敵のシミュレーションの詳細度。rectに位置を反映する範囲からの距離[px]の境界と、各段階を何ステップに1回移動させるか
+    LOD_RINGS = (0, 900)
+    LOD_INTERVALS = (1, 2, 4)
+    # 処理が重い時（FrameGovernorの"lod"段階）の各段階の移動の間隔と、"spawn"段階での敵の数の上限
+    GOVERNOR_LOD_INTERVALS = (1, 4, 8)
+    GOVERNOR_ENEMY_CAP = 400
+    # 敵のスポーンを定義したウェーブのファイル（形式はWaveSchedulerを参照）
+    WAVES_PATH = "waves.json"
+    # 1フレームで追いつくために実行するシミュレーションステップの上限（これを超えた分は捨てる）
+    MAX_STEPS_PER_FRAME = 5
+    # F9で書き出すトレースファイル
+    TRACE_PATH = "profile_trace.json"
+    # ボスが出始める前（PREWARM_END_SEC）までに、PREWARM_START_SECからオブジェクトプールを少しずつ満たしておく
+    PREWARM_START_SEC = 35
+    PREWARM_END_SEC = 45
+    # 事前に用意しておく数 {プール: 数}（弾はECSを使う場合はすぐエンティティに変換してプールに戻すので用意しない）
+    PREWARM_COUNTS = {"enemy": 150, "boss": 8, "bullet": 200}
+    # 1ステップで事前生成する最大数（一度に生成して処理落ちしないように）
+    PREWARM_BATCH = 10
+    # 起動時に読み込みきれなかった画像の登録に1フレームで使う時間[秒]
+    LOADER_BUDGET_SEC = 0.002
+
+    def __init__(self,
+                 screen: Surface,
+                 input_source: LiveInput | ScriptedInput | InputRecorder | ReplayInput | None = None,
+                 seed: int | None = None,
+                 profiler: Profiler | None = None,
+                 fixed_dtime: float | None = None,
+                 realtime: bool = True,
+                 tick_rate: float | None = 60,
+                 render: bool = True,
+                 dirty_rects: bool = False,
+                 waves: list[dict] | None = None,
+                 score_thresholds: list[int] | None = None,
+                 governor: bool = False,
+                 loader: AssetLoader | None = None,
+                 ecs_projectiles: bool = True) -> None:
+        """
+        ゲームを生成する関数
+        引数1: 描画先のSurface
+        引数2: 入力の取得元（Noneなら実際のキーボード・マウス）
+        引数3: 乱数のシード（Noneなら固定しない）
+        引数4: 処理時間の計測器（任意）
+        引数5: 毎フレームの経過時間をこの値に固定する（Noneなら実際の経過時間）
+        引数6: Falseならフレームレートの上限やゲーム終了時の待ち時間を無くす（ヘッドレス実行用）
+        引数7: 1秒あたりのシミュレーションステップ数（Noneならフレームの経過時間でそのまま1回進める）
+        引数8: Falseなら描画せずにシミュレーションだけを行う
+        引数9: Trueなら画面のうち変わった範囲だけをディスプレイに転送する
+        引数10: ウェーブの定義のリスト（NoneならWAVES_PATHから読み込む）
+        引数11: プレイヤーの攻撃が強化される4段階のスコア（NoneならSCORE_THRESHOLDS）
+        引数12: Trueなら処理時間に応じて品質を自動で上げ下げする（実時間に依存するので記録・再生とは併用しない）
+        引数13: 起動時の読み込みの続きを毎フレーム少しずつ進めるAssetLoader（任意）
+        引数14: Falseなら銃弾とボスの攻撃をECSでなく各Spriteで持つ（NumPyが無い場合と同じ。両者の比較用）
+        """
+        if seed is not None:
+            random.seed(seed)
+        # 前のゲームでプールに戻したオブジェクトを持ち越さない（事前生成する数がゲームごとに同じになるように）
+        ObjectPool.clear_all()
+        self.screen = screen
+        self.input = input_source if input_source is not None else LiveInput()
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.fixed_dtime = fixed_dtime
+        self.realtime = realtime
+        self.step_sec = 1 / tick_rate if tick_rate else None
+        self.render = render
+        self.score_thresholds = score_thresholds if score_thresholds is not None else self.SCORE_THRESHOLDS
+        self.dirty_rects = DirtyRects(screen.get_rect(), enabled=dirty_rects)
+        self.loader = loader
+        # 最初のフレームを表示した時刻（起動時間の計測用）
+        self.first_frame_time: float | None = None
+        self.governor = FrameGovernor(on_change=lambda previous, level: self.apply_quality()) if governor else None
+        # HPバーとデバッグ用の文字を描画するかどうか・敵の数の上限（apply_qualityで設定する）
+        self.show_details = True
+        self.enemy_cap: int | None = None
+        # 上限に達していたためスポーンさせなかった数
+        self.skipped_spawns = 0
+        # まだシミュレーションしていない経過時間
+        self.accumulator = 0.0
+        # 直前のフレームで実行したシミュレーションステップ数
+        self.sim_steps = 0
+
+        self.max_fps = 60
+        self.dtime = 0 # 前のフレームからどのくらい経ったか
+        self.frame = 0
+
+        # 様々な変数の初期化
+        # 敵のスポーンや無敵時間などの時間で起きる処理はすべてこのスケジューラで実行する
+        self.scheduler = Scheduler()
+        # 当たり判定で起きたダメージはここに記録し、ステップの最後にまとめて与える
+        self.damage_events = DamageEvents()
+        self.effect_group = HP_Bar_Group()
+        self.player = Player([0, 0], self.effect_group)
+        self.camera = Camera(screen, self.player)
+        self.background = Background(self.camera)
+        self.player_group = Group_support_camera(self.player)
+        self.enemies = Group_support_camera()
+        self.enemies.spatial_index = SpatialHash()
+        # NumPyがあれば弾はECSの配列にまとめて持ち、システム関数でまとめて移動・判定・描画する
+        self.world = ecs.World() if HAS_NUMPY and ecs_projectiles else None
+        self.bullets: Group_support_camera | Entity_Group
+        self.flame: Group_support_camera | Entity_Group
+        if self.world is not None:
+            self.bullets = Entity_Group(self.world, "bullet", Bullet.COMPONENTS)
+            self.flame = Entity_Group(self.world, "flame", Bullet.COMPONENTS)
+        else:
+            self.bullets = Group_support_camera()
+            self.bullets.spatial_index = SpatialHash()
+            self.flame = Group_support_camera()
+        # NumPyがあれば敵の移動をまとめて計算する（移動できる範囲のフローフィールドに沿って進み、密集しないように離れる）
+        move_area = Rect(-MoveArea.width // 2, -MoveArea.height // 2, MoveArea.width, MoveArea.height)
+        # 画面から遠い敵は移動の頻度を下げ、画像の切り替えや当たり判定も行わない
+        self.swarm = Swarm(flow_area=move_area, flow_cell_size=self.FLOW_CELL_SIZE, separation=self.SEPARATION_SPEED,
+                           lod=SimulationLOD(self.LOD_RINGS, self.LOD_INTERVALS)) if HAS_NUMPY else None
+        self.apply_quality()
+        self.clock = pg.time.Clock()
+        self.score = Score(self.camera)
+        # 描画順に並べたグループ
+        self.draw_groups: dict[str, Group_support_camera | Entity_Group] = {
+            "bullets": self.bullets,
+            "enemies": self.enemies,
+            "flame": self.flame,
+            "effect": self.effect_group,
+            "player": self.player_group,
+        }
+
+        self.waves = WaveScheduler(self.scheduler, waves if waves is not None else WaveScheduler.load(self.WAVES_PATH), self.spawn_enemy)
+        # 一定間隔でマウス方向に銃弾を飛ばす
+        self.scheduler.call_later(self.player.attack_interval, self.player_shoot)
+        self.suvive_time_tmr = 0
+        self.next_score = self.score_thresholds[0]
+
+        self.is_muteki = False
+        self.is_disable_variable_fps = False
+        self.is_stop_time = False
+        self.is_show_profiler = False
+
+        self.key_lst: Sequence[bool] = KeyState()
+        self.mouse_pos = (0, 0)
+
+    def entity_count(self) -> int:
+        return len(self.enemies) + len(self.bullets) + len(self.flame)
 
-    while True:
-        key_lst = pg.key.get_pressed()
-        for event in pg.event.get():
+    def apply_quality(self) -> None:
+        """
+        FrameGovernorの段階に合わせて軽量化の設定を切り替える関数（ガバナーが無ければ全て元の品質）
+        """
+        governor = self.governor
+        degraded = governor.active if governor is not None else lambda step: False
+        SoundBank.voice_limit = 1 if degraded("sound") else None
+        self.show_details = not degraded("hud")
+        if self.swarm is not None:
+            self.swarm.lod.set_intervals(self.GOVERNOR_LOD_INTERVALS if degraded("lod") else self.LOD_INTERVALS)
+        self.enemy_cap = self.GOVERNOR_ENEMY_CAP if degraded("spawn") else None
+
+    def spawn_enemy(self, kind: str = "normal", position: list[int] | None = None) -> Enemy_Base | None:
+        """
+        敵をスポーンさせる関数
+        引数1: 敵の種類（"normal", "fast", "boss"）
+        引数2: スポーン位置（Noneならカメラ中心位置から何pxか離れた位置）
+        戻り値: スポーンした敵（敵の数が上限に達していればNone）
+        """
+        if self.enemy_cap is not None and len(self.enemies) >= self.enemy_cap:
+            self.skipped_spawns += 1
+            return None
+        if position is None:
+            position = get_random_spawn_pos()
+        if kind == "fast":
+            enemy = Enemy.create(position, self.player, self.effect_group, speed=300, score=50, hp=10, swarm=self.swarm)
+        elif kind == "boss":
+            enemy = BOSS.create(position, self.player, self.effect_group, self.flame, swarm=self.swarm)
+        else:
+            enemy = Enemy.create(position, self.player, self.effect_group, swarm=self.swarm)
+        self.enemies.add(enemy)
+        return enemy
+
+    def prewarm_pools(self, batch: int | None = None) -> int:
+        """
+        敵・ボス・弾のオブジェクトプールをPREWARM_COUNTSの数まで満たす関数
+        引数1: 今回生成する最大数（Noneなら全部）
+        戻り値: 生成した数
+        """
+        # 画面外の遠い位置で生成してすぐにプールへ戻す
+        far = [MoveArea.width * 10, MoveArea.height * 10]
+        # 事前生成で乱数を使うとゲームの展開が変わるので、敵の画像は固定する（再利用時にresetで選び直す）
+        enemy_image = Assets.scaled("./fig/zonbi1.png", (Enemy.IMAGE_SIZES[0], Enemy.IMAGE_SIZES[0]))
+        args = {
+            "enemy": (Enemy, (far, self.player, self.effect_group), {"image": enemy_image}),
+            "boss": (BOSS, (far, self.player, self.effect_group, self.flame), {}),
+            "bullet": (Bullet, (self.player_bullet_image(), far, (1, 0), self.enemies), {}),
+        }
+        made = 0
+        for name, count in self.PREWARM_COUNTS.items():
+            if name == "bullet" and self.world is not None:
+                continue
+            cls, cls_args, cls_kwargs = args[name]
+            if batch is not None:
+                count = min(count, len(cls.pool) + batch - made)
+            made += cls.prewarm(count, *cls_args, **cls_kwargs)
+        return made
+
+    def player_shoot(self) -> None:
+        """
+        マウス方向に銃弾を飛ばし、次の射撃を予約する関数（スケジューラから呼ばれる）
+        """
+        player = self.player
+        mouse_pos = list(self.mouse_pos)
+        mouse_pos[0] -= self.screen.get_width() / 2
+        mouse_pos[1] -= self.screen.get_height() / 2
+        direction =  calc_orientation(player.rect.center, (mouse_pos[0] + self.camera.center_pos[0], mouse_pos[1] + self.camera.center_pos[1]))
+        angle = math.degrees(math.atan2(direction[1], direction[0]))
+
+        gen_beams(self.player_bullet_image(), player, angle, self.enemies, self.bullets, bullet_count=player.attack_number, speed=1000)
+        SoundBank.play("bullet")
+        self.scheduler.call_later(player.attack_interval, self.player_shoot)
+
+    @staticmethod
+    def player_bullet_image() -> Surface:
+        def factory() -> Surface:
+            image = pg.Surface((20, 10))
+            pg.draw.rect(image, (255, 0, 0), image.get_rect())
+            return image
+        return Assets.get("player_bullet", factory)
+
+    def handle_events(self) -> bool:
+        """
+        入力を取得し、デバッグ用のキー操作を処理する関数
+        戻り値: ゲームを続けるならTrue、ウィンドウが閉じられたらFalse
+        """
+        events, self.key_lst, self.mouse_pos = self.input.poll()
+        for event in events:
             if event.type == pg.QUIT:
-                return 0
+                return False
             if event.type == pg.KEYDOWN and event.key == pg.K_F1:
-                max_fps = 60
-                print(f"MAX FPS: {max_fps}")
+                self.max_fps = 60
+                print(f"MAX FPS: {self.max_fps}")
             if event.type == pg.KEYDOWN and event.key == pg.K_F2:
-                max_fps = 30
-                print(f"MAX FPS: {max_fps}")
+                self.max_fps = 30
+                print(f"MAX FPS: {self.max_fps}")
             if event.type == pg.KEYDOWN and event.key == pg.K_F3:
-                max_fps = 15
-                print(f"MAX FPS: {max_fps}")
+                self.max_fps = 15
+                print(f"MAX FPS: {self.max_fps}")
             if event.type == pg.KEYDOWN and event.key == pg.K_F4:
-                is_disable_variable_fps = not is_disable_variable_fps
+                self.is_disable_variable_fps = not self.is_disable_variable_fps
             if event.type == pg.KEYDOWN and event.key == pg.K_F5:
-                is_muteki = not is_muteki
+                self.is_muteki = not self.is_muteki
             if event.type == pg.KEYDOWN and event.key == pg.K_F6:
-                is_stop_time = not is_stop_time
-        
-        # debug
-        if is_muteki:
-            player.hp = player.max_hp
-
-        # ゲームオーバー処理
-        if player.hp <= 0:
-            background.update()
-            background.draw(screen)
-            black = pg.Surface((WIDTH, HEIGHT))
-            black.fill((0,0,0))
-            black.set_alpha(128)
-            screen.blit(black, (0,0))
-
-            player.change_img(8, 10, 250)
-            player.update(key_lst,dtime)
-            player_group.draw(screen)
-
-            font = pg.font.Font(None, 250)
-            score_text = font.render(f"Game Over", 0, (255,0,0))
-            img_rct = score_text.get_rect()
-            img_rct.center = (WIDTH/2, HEIGHT/4)
-            screen.blit(score_text, img_rct)
-
-            font = pg.font.Font(None, 128)
-            score_text = font.render(f"Score: {score.score}", 0, (255,255,255))
-            img_rct = score_text.get_rect()
-            img_rct.center = (WIDTH/2, HEIGHT * 3/4)
-            screen.blit(score_text, img_rct)
-            pg.display.update()
-            time.sleep(2)
-            return
-        
-        # ゲームクリアの処理
-        if suvive_time_tmr >= SURVIVE_TIME_SEC:
-            gameFlag = True
-        if gameFlag:
-            background.update()
-            background.draw(screen)
-            black = pg.Surface((WIDTH, HEIGHT))
-            black.fill((0,0,0))
-            black.set_alpha(128)
-            screen.blit(black, (0,0))
-            # game clear
-            player.change_img(9, 10, 250)
-            player.update(key_lst,dtime)
-            player_group.draw(screen)
-
-            font = pg.font.Font(None, 250)
-            score_text = font.render(f"Game Clear", 0, (0,255,0))
-            img_rct = score_text.get_rect()
-            img_rct.center = (WIDTH/2, HEIGHT/4)
-            screen.blit(score_text, img_rct)
-
-            font = pg.font.Font(None, 128)
-            score_text = font.render(f"Score: {score.score}", 0, (255,255,255))
-            img_rct = score_text.get_rect()
-            img_rct.center = (WIDTH/2, HEIGHT * 3/4)
-            screen.blit(score_text, img_rct)
-            pg.display.update()
-            time.sleep(2)
+                self.is_stop_time = not self.is_stop_time
+            if event.type == pg.KEYDOWN and event.key == pg.K_F7:
+                print(f"Assets: {Assets.stats()}")
+                print(f"Draw: background {self.background.tile_count} tiles ({self.background.rebuild_count} rebuilds), "
+                      + ", ".join(f"{name} {group.drawn_count}/{len(group)}" for name, group in self.draw_groups.items())
+                      + f", hp bar redraws {self.effect_group.redraw_count}")
+                if self.swarm is not None:
+                    print("LOD: " + ", ".join(f"tier {tier} {count}" for tier, count in enumerate(self.swarm.lod.counts)))
+                if self.governor is not None:
+                    print(f"Governor: level {self.governor.level} {self.governor.STEPS[:self.governor.level]}, "
+                          f"avg {self.governor.average() * 1000:.1f} ms, skipped spawns {self.skipped_spawns}")
+                print("Pools: " + ", ".join(f"{pool.name} {pool.stats()}" for pool in (Enemy.pool, BOSS.pool, Bullet.pool, HP_Bar.pool)))
+            if event.type == pg.KEYDOWN and event.key == pg.K_F8:
+                self.is_show_profiler = not self.is_show_profiler
+                # 表示・非表示のどちらでもグラフの範囲が変わるので画面全体を更新する
+                self.dirty_rects.invalidate()
+            if event.type == pg.KEYDOWN and event.key == pg.K_F9:
+                self.profiler.export_chrome_trace(self.TRACE_PATH)
+                print(f"Trace: {self.TRACE_PATH}")
+            if event.type == pg.KEYDOWN and event.key == pg.K_F10:
+                self.dirty_rects.enabled = not self.dirty_rects.enabled
+                self.dirty_rects.invalidate()
+                print(f"Dirty rects: {self.dirty_rects.enabled}")
+        return True
+
+    def update(self, dtime: float) -> None:
+        """
+        1フレーム分ゲームを進める関数（描画は行わない）
+        引数1: 前のフレームからの経過時間
+        """
+        profiler = self.profiler
+        player = self.player
+        if not self.is_stop_time:
+            self.suvive_time_tmr += dtime
+
+        with profiler.scope("spawn"):
+            # スコアに応じてプレイヤーの攻撃を強化する
+            score = self.score.score
+            if score < self.score_thresholds[0]:
+                player.attack_interval = 1
+            elif score < self.score_thresholds[1]:
+                player.attack_interval = 0.5
+            elif score < self.score_thresholds[2]:
+                player.attack_interval = 0.3
+            elif score < self.score_thresholds[3]:
+                player.attack_interval = 0.1
+            else:
+                player.attack_number = 3
+
+            # 生き残っている時間に応じてウェーブを切り替える（スポーン自体はスケジューラが行う）
+            self.waves.update(self.suvive_time_tmr)
+
+            if self.PREWARM_START_SEC <= self.suvive_time_tmr < self.PREWARM_END_SEC:
+                self.prewarm_pools(self.PREWARM_BATCH)
+
+        with profiler.scope("player"):
+            # プレイヤー更新処理
+            player.update(self.key_lst, dtime)
+            self.camera.update(dtime)
+
+        with profiler.scope("timers"):
+            # 時刻になった処理（スポーン・射撃・無敵時間の終了など）だけを実行する
+            self.scheduler.advance(dtime)
+
+        with profiler.scope("enemies"):
+            if self.swarm is not None:
+                # 描画・当たり判定に関わる範囲の敵だけrectに位置を反映する
+                self.swarm.step(dtime, self.camera.view_rect(Swarm.SYNC_MARGIN))
+                # 画像の切り替えは描画されうる範囲（詳細度の段階0）の敵だけ行う
+                for enemy in self.swarm.near:
+                    enemy.update(dtime)
+                near_enemies = self.swarm.near
+            else:
+                self.enemies.update(dtime)
+                near_enemies = self.enemies
+
+        with profiler.scope("collision"):
+            # 段階0より外の敵にはプレイヤーも銃弾（画面外で消える）も届かない
+            self.enemies.spatial_index.build(near_enemies)
+            # 敵とプレイヤーの当たり判定処理
+            for enemy in spatial.spritecollide(player, self.enemies):
+                self.damage_events.hit(player, 10, enemy)
+
+        with profiler.scope("bullets"):
+            self.update_projectiles(dtime)
+
+        with profiler.scope("damage"):
+            self.resolve_damage()
+
+        with profiler.scope("effects"):
+            self.effect_group.update(dtime)
+
+    def update_projectiles(self, dtime: float) -> None:
+        """
+        銃弾とボスの攻撃を移動させ、当たり判定を行う関数（当たった相手へのダメージはdamage_eventsに記録する）
+        ECSで持つ場合も各Spriteで持つ場合も、このステップで倒れることが決まった相手には当たらずに通り抜ける
+        引数1: 前のフレームからの経過時間
+        """
+        if self.world is None:
+            self.bullets.update(dtime, self.damage_events)
+            self.flame.update(dtime, self.damage_events)
+            # 銃弾とボスの攻撃の当たり判定処理
+            self.bullets.spatial_index.build(self.bullets)
+            spatial.groupcollide(self.flame, self.bullets, True, True)
             return
-        if not is_stop_time:
-            suvive_time_tmr += dtime
-
-        # スコアに応じてプレイヤーの攻撃を強化する
-        if score.score < score_thresholds[0]:
-            player.attack_interval = 1
-        elif score.score < score_thresholds[1]:
-            player.attack_interval = 0.5
-        elif score.score < score_thresholds[2]:
-            player.attack_interval = 0.3
-        elif score.score < score_thresholds[3]:
-            player.attack_interval = 0.1
-        else:
-            player.attack_number = 3
-
-        # 生き残っている時間に応じて敵のスポーン間隔を変える処理
-        if suvive_time_tmr < 10:
-            enemy_spawn_interval_sec = 0.5
-            fast_enemy_spawn_interval_sec = 10000
-            boss_spawn_interval_sec = 10000
-        elif suvive_time_tmr < 30:
-            enemy_spawn_interval_sec = 1
-            fast_enemy_spawn_interval_sec = 1
-            boss_spawn_interval_sec = 10000
-        elif suvive_time_tmr < 45:
-            enemy_spawn_interval_sec = 10000
-            fast_enemy_spawn_interval_sec = 0.5
-            boss_spawn_interval_sec = 10
-        elif suvive_time_tmr < 60:
-            enemy_spawn_interval_sec = 10000
-            fast_enemy_spawn_interval_sec = 0.1
-            boss_spawn_interval_sec = 3
-
-        # 数秒おきに敵をスポーンさせる処理
-        if enemy_spawn_interval_tmr > enemy_spawn_interval_sec:
-            # カメラ中心位置から何pxか離れた位置に敵をスポーン
-            enemies.add(Enemy(get_random_spawn_pos(), player, effect_group))
-            enemy_spawn_interval_tmr = 0
-        enemy_spawn_interval_tmr += dtime
-
-        if fast_enemy_spawn_interval_tmr > fast_enemy_spawn_interval_sec:
-            enemies.add(Enemy(get_random_spawn_pos(), player, effect_group, speed=300, score=50, hp=10))
-            fast_enemy_spawn_interval_tmr = 0
-        fast_enemy_spawn_interval_tmr += dtime
-
-        if boss_spawn_interval_tmr > boss_spawn_interval_sec:
-            # カメラ中心位置から何pxか離れた位置に敵をスポーン
-            enemies.add(BOSS(get_random_spawn_pos(), player, effect_group, flame))
-            boss_spawn_interval_tmr = 0
-        boss_spawn_interval_tmr += dtime
-
-        # 背景
-        background.update()
-        
-        # プレイヤー更新処理
-        player.update(key_lst,dtime)
-        # 数秒おきにマウス方向に銃弾を飛ばす
-        if player_shoot_interval_tmr > player.attack_interval:
-            player_shoot_interval_tmr = 0
-            mouse_pos = list(pg.mouse.get_pos())
-            mouse_pos[0] -= screen.get_width() / 2
-            mouse_pos[1] -= screen.get_height() / 2
-            direction =  calc_orientation(player.rect.center, (mouse_pos[0] + camera.center_pos[0], mouse_pos[1] + camera.center_pos[1]))
-            angle = math.degrees(math.atan2(direction[1], direction[0]))
-
-            score_text = pg.Surface((20, 10))
-            pg.draw.rect(score_text, (255, 0, 0), score_text.get_rect())
-            bs = gen_beams(score_text, player, angle, enemies, bullet_count=player.attack_number, speed=1000)
-            for b in bs:
-                bullets.add(b)
-            pg.mixer.Sound("./fig/se_bullet.mp3").play()
-        player_shoot_interval_tmr += dtime
-
-        camera.update(dtime)
-        enemies.update(dtime)
-        # 敵とプレイヤーの当たり判定処理
-        for _ in pg.sprite.spritecollide(player, enemies, False):
-            player.give_damage(10)
-
-        bullets.update(dtime, score)
-        flame.update(dtime, score)
-        # 銃弾とボスの攻撃の当たり判定処理
-        pg.sprite.groupcollide(flame, bullets, True, True)
-
-        effect_group.update(dtime)
-
-        # 描画処理
-        background.draw(screen)
-        bullets.draw(screen)
-        enemies.draw(screen)
-        flame.draw(screen)
-        effect_group.draw(screen)
-        player_group.draw(screen)
-        # UI
-        score.update(screen)
-
-        # 次の攻撃強化までのゲージ
-        next_score_tmp = next_score
-        prev_score = 0
-        for i in range(len(score_thresholds)):
-            if score.score < score_thresholds[i]:
-                next_score = score_thresholds[i]
-                prev_score = score_thresholds[i - 1] if i > 0 else 0
+
+        # ECSで持つ場合はBullet.updateと同じ処理をまとめて行う
+        world = self.world
+        bullets, flame = self.bullets.archetype, self.flame.archetype
+        view = self.camera.view_rect()
+        for archetype in (bullets, flame):
+            ecs.movement_system(archetype, dtime)
+            ecs.lifetime_system(world, archetype, dtime, view)
+
+        # 銃弾と敵の当たり判定処理（当たった敵全員へのダメージを記録する）
+        damage_events = self.damage_events
+        for entity, targets in ecs.collide_sprites(bullets, self.enemies):
+            # 当たり判定は先にまとめて行うので、前の銃弾で倒れる敵はここで外す（Spriteの銃弾で倒れた敵がグループから外れるのと同じ）
+            targets = [target for target in targets if not damage_events.is_doomed(target)]
+            if not targets:
+                continue
+            damage = int(bullets["damage"][bullets.row(entity)])
+            world.despawn(entity)
+            for target in targets:
+                damage_events.hit(target, damage, entity)
+
+        # ボスの攻撃とプレイヤーの当たり判定処理
+        for entity in ecs.overlapping(flame, self.player.rect):
+            if damage_events.is_doomed(self.player):
                 break
-        else:
-            next_score = -1
-        if next_score != -1:
-            percent = (score.score - prev_score) / (next_score - prev_score)
-            pg.draw.rect(screen, (0, 0, 0), pg.Rect(0, 0, camera.screen.get_width(), 20))
-            pg.draw.rect(screen, (255, 255, 0), pg.Rect(0, 5, camera.screen.get_width() * percent, 10))
-        if next_score != next_score_tmp:
-            pg.mixer.Sound("./fig/se_powerup.mp3").play()
-
-        font = pg.font.Font(None, 128)
-        score_text = font.render(f"{int(SURVIVE_TIME_SEC - suvive_time_tmr)}", 0, (0, 255, 0))
-        img_rct = score_text.get_rect()
-        img_rct.midtop = (WIDTH / 2, 20)
-        screen.blit(score_text, img_rct)
-
-        # debug ui
-        font = pg.font.Font(None, 64)
-        if is_muteki:
-            muteki_text = font.render(f"Debug: Enable muteki!!!", 0, (255, 255, 255))
-            img_rct = muteki_text.get_rect()
-            img_rct.bottomright = (WIDTH, HEIGHT)
-            screen.blit(muteki_text, img_rct)
-        
-        if max_fps != 60:
-            fps_text = font.render(f"Debug: FPS: {max_fps}", 0, (255, 255, 255))
-            img_rct = fps_text.get_rect()
-            img_rct.bottomright = (WIDTH, HEIGHT - 64)
-            screen.blit(fps_text, img_rct)
-        
-        if is_disable_variable_fps:
-            fps_text = font.render(f"Debug: Disable variable fps", 0, (255, 255, 255))
-            img_rct = fps_text.get_rect()
-            img_rct.bottomright = (WIDTH, HEIGHT - 128)
-            screen.blit(fps_text, img_rct)
-        
-        if is_stop_time:
-            fps_text = font.render(f"Debug: Stop time", 0, (255, 255, 255))
-            img_rct = fps_text.get_rect()
-            img_rct.bottomright = (WIDTH, HEIGHT - 192)
-            screen.blit(fps_text, img_rct)
+            damage = int(flame["damage"][flame.row(entity)])
+            world.despawn(entity)
+            damage_events.hit(self.player, damage, entity)
+
+        # 銃弾とボスの攻撃の当たり判定処理（当たったものどうしを両方消す）
+        for entities in ecs.overlapping_pairs(flame, bullets):
+            for entity in entities:
+                world.despawn(entity)
+
+    def resolve_damage(self) -> None:
+        """
+        このステップの当たり判定で記録したダメージをまとめて与え、倒した敵のスコアを1回で加算する関数
+        """
+        killed = self.damage_events.resolve()
+        score = sum(target.get_score() for target in killed if isinstance(target, Enemy_Base))
+        if score:
+            self.score.score_up(score)
+
+    def snapshot(self) -> None:
+        """
+        描画時の補間のために現在の位置を記録する関数
+        """
+        self.camera.snapshot()
+        for group in self.draw_groups.values():
+            group.snapshot()
+
+    def step(self, dtime: float) -> None:
+        """
+        シミュレーションを1ステップ進める関数
+        引数1: 進める時間
+        """
+        if self.step_sec is not None and self.render:
+            self.snapshot()
+        # debug
+        if self.is_muteki:
+            self.player.hp = self.player.max_hp
+        self.update(dtime)
+
+    def is_finished(self) -> bool:
+        return self.player.hp <= 0 or self.suvive_time_tmr >= self.SURVIVE_TIME_SEC
+
+    def advance(self, dtime: float) -> float:
+        """
+        経過時間の分だけ固定間隔でシミュレーションを進める関数
+        引数1: 前のフレームからの経過時間
+        戻り値: 描画時の補間率
+        """
+        if self.step_sec is None:
+            self.step(dtime)
+            self.sim_steps = 1
+            return 1.0
+        self.accumulator += dtime
+        steps = 0
+        # 浮動小数点の誤差でステップ数がぶれないように少しだけ余裕を持たせる
+        while self.accumulator >= self.step_sec - 1e-9:
+            if steps >= self.MAX_STEPS_PER_FRAME:
+                # 追いつけない分は捨てる（処理落ちの悪循環を防ぐ）
+                self.accumulator = 0.0
+                break
+            self.step(self.step_sec)
+            self.accumulator = max(self.accumulator - self.step_sec, 0.0)
+            steps += 1
+            if self.is_finished():
+                break
+        self.sim_steps = steps
+        return min(self.accumulator / self.step_sec, 1.0)
+
+    def draw(self, alpha: float = 1.0) -> None:
+        """
+        現在の状態を描画する関数
+        引数1: 直前のステップ開始時の状態(0.0)から現在の状態(1.0)までの補間率
+        """
+        screen = self.screen
+        dirty = self.dirty_rects
+        with self.profiler.scope("draw"):
+            # 描画処理
+            dirty.add("background", self.background.draw(screen, alpha))
+            for group in self.draw_groups.values():
+                if group is self.effect_group:
+                    if self.show_details:
+                        dirty.add("effects", group.draw(screen, alpha))
+                    continue
+                dirty.add("entities", group.draw(screen, alpha))
+
+        with self.profiler.scope("hud"):
+            # UI
+            dirty.add_rect("hud", self.score.update(screen))
+
+            # 次の攻撃強化までのゲージ
+            next_score_tmp = self.next_score
+            prev_score = 0
+            for i in range(len(self.score_thresholds)):
+                if self.score.score < self.score_thresholds[i]:
+                    self.next_score = self.score_thresholds[i]
+                    prev_score = self.score_thresholds[i - 1] if i > 0 else 0
+                    break
+            else:
+                self.next_score = -1
+            if self.next_score != -1:
+                percent = (self.score.score - prev_score) / (self.next_score - prev_score)
+                dirty.add_rect("hud", pg.draw.rect(screen, (0, 0, 0), pg.Rect(0, 0, screen.get_width(), 20)))
+                pg.draw.rect(screen, (255, 255, 0), pg.Rect(0, 5, screen.get_width() * percent, 10))
+            if self.next_score != next_score_tmp:
+                SoundBank.play("powerup")
+
+            dirty.add_rect("hud", Text.draw_number(screen, int(self.SURVIVE_TIME_SEC - self.suvive_time_tmr), 128, (0, 255, 0), midtop=(WIDTH / 2, 20)))
+
+            # debug ui（処理が重い時は描画しない）
+            if self.show_details:
+                if self.is_muteki:
+                    dirty.add_rect("hud", Text.draw(screen, "Debug: Enable muteki!!!", 64, (255, 255, 255), bottomright=(WIDTH, HEIGHT)))
+            
+                if self.max_fps != 60:
+                    dirty.add_rect("hud", Text.draw(screen, f"Debug: FPS: {self.max_fps}", 64, (255, 255, 255), bottomright=(WIDTH, HEIGHT - 64)))
+            
+                if self.is_disable_variable_fps:
+                    dirty.add_rect("hud", Text.draw(screen, "Debug: Disable variable fps", 64, (255, 255, 255), bottomright=(WIDTH, HEIGHT - 128)))
+            
+                if self.is_stop_time:
+                    dirty.add_rect("hud", Text.draw(screen, "Debug: Stop time", 64, (255, 255, 255), bottomright=(WIDTH, HEIGHT - 192)))
+
+        if self.is_show_profiler:
+            with self.profiler.scope("profiler"):
+                self.profiler.draw(screen)
+                # グラフは毎フレーム全体が変わるので画面全体を更新する
+                dirty.invalidate()
+
+    def draw_result(self, title: str, color: tuple[int, int, int], img_num: int) -> None:
+        """
+        ゲームオーバー・ゲームクリアの画面を描画する関数
+        引数1: 表示する文字列
+        引数2: 文字色
+        引数3: Player画像ファイル名の番号
+        """
+        screen = self.screen
+        self.background.update()
+        self.background.draw(screen)
+        black = pg.Surface((WIDTH, HEIGHT))
+        black.fill((0,0,0))
+        black.set_alpha(128)
+        screen.blit(black, (0,0))
+
+        self.player.change_img(img_num, 10, 250)
+        self.player.update(self.key_lst, self.dtime)
+        self.player_group.draw(screen)
+
+        Text.draw(screen, title, 250, color, center=(WIDTH/2, HEIGHT/4))
+        Text.draw(screen, f"Score: {self.score.score}", 128, (255,255,255), center=(WIDTH/2, HEIGHT * 3/4))
+        SoundBank.flush()
         pg.display.update()
+        if self.realtime:
+            time.sleep(2)
 
-        dtime = clock.tick(max_fps) / 1000
-        if is_disable_variable_fps:
+    def tick(self) -> float:
+        """
+        フレームレートを調整し、前のフレームからの経過時間を返す関数
+        """
+        dtime = self.clock.tick(self.max_fps if self.realtime else 0) / 1000
+        if self.is_disable_variable_fps:
             dtime = 1 / 30
+        if self.fixed_dtime is not None:
+            dtime = self.fixed_dtime
+        # 入力の記録・再生では経過時間も記録・再生する
+        return self.input.frame_time(dtime)
+
+    def run(self, hook: Callable[["Game"], None] | None = None) -> int | None:
+        """
+        ゲームのメインループ
+        引数1: 毎フレームの更新前に呼ぶ関数（ベンチマークのシナリオ用）
+        戻り値: ウィンドウが閉じられたら0、ゲームオーバー・ゲームクリアならNone
+        """
+        profiler = self.profiler
+        while True:
+            frame_start = time.perf_counter()
+            profiler.begin_frame()
+            with profiler.scope("input"):
+                if not self.handle_events():
+                    return 0
+            if hook is not None:
+                hook(self)
+            if self.loader is not None and not self.loader.done:
+                with profiler.scope("loading"):
+                    self.loader.pump(self.LOADER_BUDGET_SEC)
+
+            # debug
+            if self.is_muteki:
+                self.player.hp = self.player.max_hp
+
+            # ゲームオーバー処理
+            if self.player.hp <= 0:
+                self.draw_result("Game Over", (255,0,0), 8)
+                return
+
+            # ゲームクリアの処理
+            if self.suvive_time_tmr >= self.SURVIVE_TIME_SEC:
+                self.draw_result("Game Clear", (0,255,0), 9)
+                return
+
+            alpha = self.advance(self.dtime)
+            if self.render:
+                self.draw(alpha)
+                with profiler.scope("present"):
+                    SoundBank.flush()
+                    self.dirty_rects.present()
+            if self.first_frame_time is None:
+                self.first_frame_time = time.perf_counter()
+            profiler.count("enemies", len(self.enemies))
+            profiler.count("bullets", len(self.bullets))
+            profiler.count("flame", len(self.flame))
+            profiler.count("sim_steps", self.sim_steps)
+            profiler.count("timers", len(self.scheduler))
+            profiler.count("damage_events", self.damage_events.event_count)
+            profiler.count("hp_bar_redraws", self.effect_group.redraw_count)
+            profiler.count("dirty_rects", self.dirty_rects.rect_count)
+            if self.swarm is not None:
+                for tier, count in enumerate(self.swarm.lod.counts):
+                    profiler.count(f"lod_tier{tier}", count)
+            if self.governor is not None:
+                profiler.count("quality_level", self.governor.level)
+                # フレームレート調整の待ち時間を除いた処理時間で品質を上げ下げする
+                self.governor.observe(time.perf_counter() - frame_start)
+            profiler.end_frame()
+
+            self.frame += 1
+            self.dtime = self.tick()
+
+
+# モジュールの読み込みが終わった時刻（起動時間の計測用）
+IMPORTED_TIME = time.perf_counter()
+
+
+def init_pygame() -> None:
+    """
+    ゲームで使うpygameの機能（画面と文字）だけを初期化する関数
+    音声の出力は最初の効果音を再生する時にSoundBankが初期化する
+    """
+    pg.display.init()
+    pg.font.init()
+
+
+def main(record: str | None = None, replay: str | None = None, measure_startup: bool = False, atlas: bool = True):
+    """
+    ウィンドウを開いてゲームを実行する関数
+    引数1: 入力・経過時間・乱数のシードをこのファイルに記録する（任意）
+    引数2: このファイルに記録した入力でゲームを再生する（任意）
+    引数3: Trueなら最初のフレームを表示したら終了し、そこまでの時間と残りの読み込みが終わるまでの時間を出力する
+    引数4: Falseならbake_atlas.pyで書き出したアトラスがあっても使わない
+    """
+    # 各段階が終わった時刻
+    times = {"import": IMPORTED_TIME}
+    init_pygame()
+    times["init"] = time.perf_counter()
+    pg.display.set_caption("サバイブ")
+    screen = pg.display.set_mode((WIDTH, HEIGHT))
+    times["window"] = time.perf_counter()
+    if atlas:
+        Assets.load_atlas()
+    # 画像と効果音を裏で読み込み、最初のウェーブに必要なものが揃うまで読み込み画面を表示する
+    loader = start_loading()
+    try:
+        if not loader.wait_required(screen):
+            return 0
+        times["assets"] = time.perf_counter()
+        recorder = None
+        if replay is not None:
+            input_source = ReplayInput(replay)
+            game = Game(screen, input_source, seed=input_source.seed, loader=loader)
+        elif record is not None:
+            recorder = InputRecorder(LiveInput(), record, random.randrange(2 ** 32))
+            game = Game(screen, recorder, seed=recorder.seed, loader=loader)
+        else:
+            game = Game(screen, governor=True, loader=loader)
+        hook = None
+        if measure_startup:
+            def hook(game: Game) -> None:
+                # 最初のフレームを表示したらウィンドウを閉じたことにして終了する
+                if game.first_frame_time is not None:
+                    pg.event.post(pg.event.Event(pg.QUIT))
+        try:
+            return game.run(hook)
+        finally:
+            if recorder is not None:
+                recorder.close()
+            if measure_startup and game.first_frame_time is not None:
+                times["first_frame"] = game.first_frame_time
+                # ゲーム中に少しずつ行う残りの読み込みも、まとめて終わらせて時間を計る
+                while not loader.done:
+                    loader.pump(timeout=0.05)
+                times["all_assets"] = time.perf_counter()
+                print(json.dumps({f"{name}_ms": round((t - STARTUP_TIME) * 1000, 1) for name, t in times.items()}, indent=2))
+    finally:
+        loader.shutdown()
 
 
 if __name__ == "__main__":
-    pg.init()
-    main()
+    parser = argparse.ArgumentParser(description="サバイブ")
+    parser.add_argument("--record", help="record input, frame times and the random seed to this file")
+    parser.add_argument("--replay", help="play back a file written by --record")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="exit after the first frame and print the time to import, open the window, "
+                             "load the first wave's assets, show the first frame and finish loading (ms since startup)")
+    parser.add_argument("--no-atlas", action="store_true", help="decode images from ./fig even if a baked atlas exists")
+    args = parser.parse_args()
+    main(args.record, args.replay, args.measure_startup, not args.no_atlas)
     pg.quit()
     sys.exit()
@@ -0,0 +1,241 @@
+"""
+敵の移動をNumPy配列でまとめて計算するモジュール（NumPyが無い環境では使えない）
+"""
+from pygame.rect import Rect
+from pygame.sprite import Sprite
+
+from flowfield import FlowField
+from lod import SimulationLOD
+
+try:
+    import numpy as np
+except ImportError:  # NumPyが無ければ各Spriteのupdateで移動する
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+class Swarm:
+    """
+    登録された敵の位置・速さ・止まる距離・攻撃対象を配列で持ち、1回の計算で全員を移動させるクラス
+    """
+
+    # 画面外のこの幅までにいる敵はrectに位置を反映する（画面に入る直前の敵の当たり判定・描画のため）
+    SYNC_MARGIN = 300
+    # 密集を避ける際に、同じマスにいる敵どうしを離す。そのマスの大きさ[px]
+    SEPARATION_CELL = 80
+
+    def __init__(self,
+                 capacity: int = 1024,
+                 flow_area: Rect | None = None,
+                 flow_cell_size: int = 100,
+                 separation: float = 0.0,
+                 lod: SimulationLOD | None = None) -> None:
+        """
+        空の群れを生成する関数
+        引数1: 最初に確保しておく人数
+        引数2: フローフィールドで覆う範囲（Noneならフローフィールドを使わず攻撃対象へまっすぐ進む）
+        引数3: フローフィールドのマスの大きさ[px]
+        引数4: 密集した敵どうしを離す速さ[px/秒]（0なら離さない）
+        引数5: 画面から遠い敵の移動の頻度を下げる詳細度（Noneなら全員を毎ステップ移動させる）
+        """
+        if np is None:
+            raise RuntimeError("Swarm requires numpy")
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+        self.stop_distance = np.zeros(capacity)
+        self.target_idx = np.zeros(capacity, dtype=np.intp)
+        # 移動中かどうか（止まる距離より遠いか）
+        self.moving = np.zeros(capacity, dtype=bool)
+        # 位置が変わったがrectに反映していないかどうか
+        self.dirty = np.zeros(capacity, dtype=bool)
+        # 画面外でも毎フレームrectに反映するかどうか
+        self.always_sync = np.zeros(capacity, dtype=bool)
+        # 詳細度により移動を飛ばしている間に溜まった経過時間
+        self.lod_dtime = np.zeros(capacity)
+        self.sprites: list[Sprite] = []
+        self._targets: list[Sprite] = []
+        self._slots: dict[Sprite, int] = {}
+        self.synced_count = 0
+        self.flow_area = Rect(flow_area) if flow_area is not None else None
+        self.flow_cell_size = flow_cell_size
+        # 攻撃対象ごとのフローフィールド（_targetsと同じ順）
+        self.flow_fields: list[FlowField] = []
+        self.separation = separation
+        self.lod = lod
+        # 直前のstepで詳細度の段階0（rectに位置を反映する範囲）にいた敵
+        self.near: list[Sprite] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, sprite: Sprite) -> bool:
+        return sprite in self._slots
+
+    def _grow(self) -> None:
+        capacity = len(self.speed) * 2
+        for name in ("pos", "speed", "stop_distance", "target_idx", "moving", "dirty", "always_sync", "lod_dtime"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, sprite: Sprite, speed: float, stop_distance: float, target: Sprite, always_sync: bool = False) -> None:
+        """
+        敵を群れに登録する関数（以降の移動は群れが行う）
+        引数1: 敵のSprite（rect.centerを初期位置とする）
+        引数2: 移動の速さ（px/秒）
+        引数3: 攻撃対象にこの距離まで近づいたら止まる
+        引数4: 攻撃対象
+        引数5: 画面外でもrectを毎フレーム更新するかどうか
+        """
+        if sprite in self._slots:
+            return
+        if self.count == len(self.speed):
+            self._grow()
+        if target not in self._targets:
+            self._targets.append(target)
+            if self.flow_area is not None:
+                self.flow_fields.append(FlowField(self.flow_area, self.flow_cell_size))
+        idx = self.count
+        self.pos[idx] = sprite.rect.center
+        self.speed[idx] = speed
+        self.stop_distance[idx] = stop_distance
+        self.target_idx[idx] = self._targets.index(target)
+        self.moving[idx] = True
+        self.dirty[idx] = False
+        self.always_sync[idx] = always_sync
+        self.lod_dtime[idx] = 0.0
+        self.sprites.append(sprite)
+        self._slots[sprite] = idx
+        self.count += 1
+
+    def remove(self, sprite: Sprite) -> None:
+        """
+        敵を群れから外す関数（末尾の敵を空いた位置に詰める）
+        引数1: 敵のSprite
+        """
+        idx = self._slots.pop(sprite, None)
+        if idx is None:
+            return
+        last = self.count - 1
+        if idx != last:
+            for arr in (self.pos, self.speed, self.stop_distance, self.target_idx, self.moving, self.dirty, self.always_sync, self.lod_dtime):
+                arr[idx] = arr[last]
+            moved = self.sprites[last]
+            self.sprites[idx] = moved
+            self._slots[moved] = idx
+        self.sprites.pop()
+        self.count = last
+
+    def is_moving(self, sprite: Sprite) -> bool:
+        """
+        直前のstepで敵が移動したかどうかを返す関数
+        """
+        idx = self._slots.get(sprite)
+        return idx is not None and bool(self.moving[idx])
+
+    def step(self, delta_time: float, view_rect: Rect | None = None) -> None:
+        """
+        全員を攻撃対象に向けて移動させ、描画されるSpriteのrectに位置を反映する関数
+        詳細度があれば、view_rectから遠い敵は数ステップに1回、溜まった経過時間の分だけまとめて移動させる
+        引数1: 前のフレームからの経過時間
+        引数2: rectに反映する範囲（Noneなら全員に反映する）
+        """
+        n = self.count
+        self.synced_count = 0
+        if n == 0:
+            self.near = []
+            return
+        pos = self.pos[:n]
+        if self.lod is not None and view_rect is not None:
+            tiers, due = self.lod.plan(pos, view_rect)
+            elapsed = self.lod_dtime[:n] + delta_time
+            step_dtime = np.where(due, elapsed, 0.0)
+            self.lod_dtime[:n] = elapsed - step_dtime
+            self.near = [self.sprites[i] for i in np.flatnonzero(tiers == 0).tolist()]
+        else:
+            due = None
+            step_dtime = delta_time
+            self.near = list(self.sprites)
+        targets = np.array([target.rect.center for target in self._targets], dtype=float)
+        target_idx = self.target_idx[:n]
+        diff = targets[target_idx] - pos
+        dist = np.hypot(diff[:, 0], diff[:, 1])
+        direction = diff / np.maximum(dist, 1e-9)[:, None]
+        if self.flow_fields:
+            self._apply_flow(direction, pos, dist, target_idx)
+        # 攻撃対象に近づき過ぎたら止まる（0割り対策）
+        moving = dist >= self.stop_distance[:n]
+        if due is not None:
+            # 今回移動しない敵は前回の状態のまま
+            moving = np.where(due, moving, self.moving[:n])
+            changed = moving & due
+        else:
+            changed = moving
+        pos += direction * np.where(changed, self.speed[:n] * step_dtime, 0.0)[:, None]
+        if self.separation > 0:
+            changed = changed | self._separate(pos, step_dtime)
+        self.moving[:n] = moving
+        self.dirty[:n] |= changed
+        self.sync(view_rect)
+
+    def _apply_flow(self, direction: "np.ndarray", pos: "np.ndarray", dist: "np.ndarray", target_idx: "np.ndarray") -> None:
+        # フローフィールドの向きに置き換える。攻撃対象の近く（2マス以内）と範囲外ではまっすぐ進む
+        area = self.flow_area
+        use_flow = ((dist > self.flow_cell_size * 2)
+                    & (pos[:, 0] >= area.left) & (pos[:, 0] < area.right)
+                    & (pos[:, 1] >= area.top) & (pos[:, 1] < area.bottom))
+        single_target = len(self.flow_fields) == 1
+        for i, field in enumerate(self.flow_fields):
+            field.update(self._targets[i].rect.center)
+            mask = use_flow if single_target else use_flow & (target_idx == i)
+            if mask.any():
+                direction[mask] = field.sample(pos[mask])
+
+    def _separate(self, pos: "np.ndarray", delta_time: "float | np.ndarray") -> "np.ndarray":
+        # 同じマスにいる敵どうしを、マス内の重心から離れる向きに押し出す（マス単位なので人数に比例した計算量）
+        cells = np.floor(pos / self.SEPARATION_CELL).astype(np.int64)
+        cells -= cells.min(axis=0)
+        keys = cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1]
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        crowded = counts[inverse] > 1
+        if not crowded.any():
+            return crowded
+        centroid = np.stack([np.bincount(inverse, weights=pos[:, 0]), np.bincount(inverse, weights=pos[:, 1])], axis=1)
+        centroid /= counts[:, None]
+        away = pos - centroid[inverse]
+        norm = np.hypot(away[:, 0], away[:, 1])
+        # 重心とぴったり重なっている敵は番号から決めた向きに離す
+        overlap = norm < 1e-6
+        if overlap.any():
+            angle = np.flatnonzero(overlap) * 2.399963
+            away[overlap] = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+            norm[overlap] = 1.0
+        before = np.rint(pos)
+        pos += np.where(crowded, self.separation * delta_time / norm, 0.0)[:, None] * away
+        # rectの位置（整数）が変わった敵だけ反映すれば良い
+        return crowded & (np.rint(pos) != before).any(axis=1)
+
+    def sync(self, view_rect: Rect | None = None) -> None:
+        """
+        位置が変わった敵のうち、範囲内にいるものだけrectに位置を反映する関数
+        引数1: 範囲（Noneなら全員）
+        """
+        n = self.count
+        pos = self.pos[:n]
+        mask = self.dirty[:n].copy()
+        if view_rect is not None:
+            in_view = ((pos[:, 0] >= view_rect.left) & (pos[:, 0] <= view_rect.right)
+                       & (pos[:, 1] >= view_rect.top) & (pos[:, 1] <= view_rect.bottom))
+            mask &= in_view | self.always_sync[:n]
+        indices = np.flatnonzero(mask)
+        if len(indices) == 0:
+            return
+        centers = np.rint(pos[indices]).astype(int).tolist()
+        sprites = self.sprites
+        for idx, center in zip(indices.tolist(), centers):
+            sprites[idx].rect.center = center
+        self.dirty[indices] = False
+        self.synced_count = len(indices)
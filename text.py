@@ -0,0 +1,109 @@
+"""
+文字列の描画結果をキャッシュするモジュール
+"""
+from collections import OrderedDict
+
+import pygame as pg
+from pygame.rect import Rect
+from pygame.surface import Surface
+
+Color = tuple[int, int, int]
+
+
+class Text:
+    """
+    フォントをサイズ毎に一つだけ生成し、描画した文字列をLRU方式でキャッシュするクラス
+    """
+
+    # キャッシュしておく描画済み文字列の最大数
+    MAX_CACHE = 256
+
+    _fonts: dict[int, pg.font.Font] = {}
+    _cache: "OrderedDict[tuple[str, int, Color], Surface]" = OrderedDict()
+    # (サイズ, 色): {文字: 画像} 数字を一文字ずつ描画するための画像集
+    _glyphs: dict[tuple[int, Color], dict[str, Surface]] = {}
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def font(cls, size: int) -> pg.font.Font:
+        """
+        指定サイズのデフォルトフォントを返す関数
+        引数1: フォントサイズ
+        """
+        font = cls._fonts.get(size)
+        if font is None:
+            font = pg.font.Font(None, size)
+            cls._fonts[size] = font
+        return font
+
+    @classmethod
+    def render(cls, text: str, size: int, color: Color) -> Surface:
+        """
+        文字列を描画したSurfaceを返す関数。同じ文字列・サイズ・色であればキャッシュを返す
+        引数1: 文字列
+        引数2: フォントサイズ
+        引数3: 文字色
+        戻り値: 文字列を描画したSurface
+        """
+        key = (text, size, color)
+        surface = cls._cache.get(key)
+        if surface is not None:
+            cls.hits += 1
+            cls._cache.move_to_end(key)
+            return surface
+        cls.misses += 1
+        surface = cls.font(size).render(text, 0, color)
+        cls._cache[key] = surface
+        if len(cls._cache) > cls.MAX_CACHE:
+            cls._cache.popitem(last=False)
+        return surface
+
+    @classmethod
+    def draw(cls, screen: Surface, text: str, size: int, color: Color, **anchor: tuple[float, float]) -> Rect:
+        """
+        文字列を描画する関数
+        引数1: 描画先のSurface
+        引数2: 文字列
+        引数3: フォントサイズ
+        引数4: 文字色
+        キーワード引数: 配置位置（center=(x, y)、bottomright=(x, y)などRectの属性名で指定）
+        戻り値: 描画した範囲
+        """
+        surface = cls.render(text, size, color)
+        rect = surface.get_rect(**anchor)
+        return screen.blit(surface, rect)
+
+    @classmethod
+    def draw_number(cls, screen: Surface, value: int, size: int, color: Color, prefix: str = "", **anchor: tuple[float, float]) -> Rect:
+        """
+        数値を描画する関数。頻繁に変わる数値向けに、数字は一文字ずつ描画済みの画像を並べて描画する
+        引数1: 描画先のSurface
+        引数2: 数値
+        引数3: フォントサイズ
+        引数4: 文字色
+        引数5: 数値の前に表示する文字列
+        キーワード引数: 配置位置（Rectの属性名で指定）
+        戻り値: 描画した範囲
+        """
+        glyphs = cls._glyphs.get((size, color))
+        if glyphs is None:
+            glyphs = {c: cls.font(size).render(c, 0, color) for c in "0123456789-"}
+            cls._glyphs[(size, color)] = glyphs
+        head = cls.render(prefix, size, color) if prefix else None
+        digits = [glyphs[c] for c in str(value)]
+        width = sum(g.get_width() for g in digits) + (head.get_width() if head else 0)
+        height = max([g.get_height() for g in digits] + ([head.get_height()] if head else []))
+        rect = Rect(0, 0, width, height)
+        for name, pos in anchor.items():
+            setattr(rect, name, pos)
+        x = rect.x
+        blit_list = []
+        if head:
+            blit_list.append((head, (x, rect.y)))
+            x += head.get_width()
+        for glyph in digits:
+            blit_list.append((glyph, (x, rect.y)))
+            x += glyph.get_width()
+        screen.blits(blit_list, False)
+        return rect